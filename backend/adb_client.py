@@ -0,0 +1,214 @@
+"""
+Layer 1b: Native ADB Host-Protocol Client
+Talks to the adb server (default 127.0.0.1:5037) over a plain socket so
+polling does not fork the adb binary for every command.
+
+Wire format: each request is a 4-digit hex length followed by the payload,
+answered by OKAY or FAIL (+ hex length + message). The server closes a
+socket once a device service (e.g. shell:) finishes, so the pool keeps
+sockets that already completed host:transport:<serial> and are ready for
+exactly one service. Used sockets are replaced by a background thread,
+off the caller's path.
+"""
+import os
+import queue
+import socket
+import threading
+import time
+
+
+ADB_SERVER_HOST = os.environ.get('ADB_SERVER_HOST', '127.0.0.1')
+ADB_SERVER_PORT = int(os.environ.get('ADB_SERVER_PORT', '5037'))
+
+# Warm transport sockets kept per device and how long they stay usable
+POOL_SIZE_PER_DEVICE = 2
+POOL_MAX_IDLE_SECONDS = 30
+# Connect/handshake timeout for sockets opened by the refill thread
+REFILL_TIMEOUT_SECONDS = 5
+
+
+class AdbError(Exception):
+    """The adb server answered FAIL."""
+
+
+class AdbClient:
+    """Minimal adb host-protocol client with a per-serial socket pool."""
+
+    def __init__(self, host=ADB_SERVER_HOST, port=ADB_SERVER_PORT,
+                 pool_size=POOL_SIZE_PER_DEVICE, max_idle=POOL_MAX_IDLE_SECONDS):
+        self.host = host
+        self.port = port
+        self.pool_size = pool_size
+        self.max_idle = max_idle
+        self._pool = {}   # serial -> [(socket, created_at), ...]
+        self._lock = threading.Lock()
+        self._refills = queue.Queue()
+        self._refill_pending = set()  # serials queued for a refill
+        self._refiller = None
+
+    # ----- Low-level protocol -----
+    def _connect(self, timeout):
+        return socket.create_connection((self.host, self.port), timeout=timeout)
+
+    @staticmethod
+    def _recv_exact(sock, n):
+        buf = b''
+        while len(buf) < n:
+            chunk = sock.recv(n - len(buf))
+            if not chunk:
+                raise ConnectionError("adb server closed the connection")
+            buf += chunk
+        return buf
+
+    @staticmethod
+    def _recv_all(sock):
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        return b''.join(chunks)
+
+    def _send(self, sock, payload):
+        data = payload.encode('utf-8')
+        sock.sendall(b'%04x' % len(data) + data)
+        status = self._recv_exact(sock, 4)
+        if status == b'OKAY':
+            return
+        if status == b'FAIL':
+            raise AdbError(self._read_string(sock))
+        raise AdbError(f"unexpected adb response {status!r}")
+
+    def _read_string(self, sock):
+        length = int(self._recv_exact(sock, 4), 16)
+        return self._recv_exact(sock, length).decode('utf-8', errors='replace')
+
+    # ----- Connection pool -----
+    def _open_transport(self, serial, timeout):
+        sock = self._connect(timeout)
+        try:
+            self._send(sock, f"host:transport:{serial}")
+        except Exception:
+            sock.close()
+            raise
+        return sock
+
+    def _checkout(self, serial, timeout):
+        """A transport socket for serial and whether it came from the pool."""
+        now = time.monotonic()
+        with self._lock:
+            idle = self._pool.get(serial, [])
+            while idle:
+                sock, created = idle.pop()
+                if now - created <= self.max_idle:
+                    sock.settimeout(timeout)
+                    return sock, True
+                sock.close()
+        return self._open_transport(serial, timeout), False
+
+    def _request_refill(self, serial):
+        """Queue serial for a new warm socket on the refill thread."""
+        with self._lock:
+            if serial in self._refill_pending:
+                return
+            self._refill_pending.add(serial)
+            if self._refiller is None:
+                self._refiller = threading.Thread(target=self._refill_loop,
+                                                  name='adb-refill', daemon=True)
+                self._refiller.start()
+        self._refills.put(serial)
+
+    def _refill_loop(self):
+        while True:
+            serial = self._refills.get()
+            with self._lock:
+                self._refill_pending.discard(serial)
+            self._refill(serial, REFILL_TIMEOUT_SECONDS)
+
+    def _refill(self, serial, timeout):
+        """Keep one warm transport socket ready for the next command."""
+        with self._lock:
+            if len(self._pool.get(serial, [])) >= self.pool_size:
+                return
+        try:
+            sock = self._open_transport(serial, timeout)
+        except Exception:
+            return
+        with self._lock:
+            self._pool.setdefault(serial, []).append((sock, time.monotonic()))
+
+    def drop(self, serial):
+        """Close all pooled sockets for a device (e.g. when it disconnects)."""
+        with self._lock:
+            for sock, _ in self._pool.pop(serial, []):
+                sock.close()
+
+    def close(self):
+        with self._lock:
+            for idle in self._pool.values():
+                for sock, _ in idle:
+                    sock.close()
+            self._pool.clear()
+
+    # ----- Services -----
+    def version(self, timeout=5):
+        sock = self._connect(timeout)
+        try:
+            self._send(sock, "host:version")
+            return int(self._read_string(sock), 16)
+        finally:
+            sock.close()
+
+    def devices_l(self, timeout=5):
+        """Same text as `adb devices -l`, header line included."""
+        sock = self._connect(timeout)
+        try:
+            self._send(sock, "host:devices-l")
+            body = self._read_string(sock)
+        finally:
+            sock.close()
+        return "List of devices attached\n" + body
+
+    def shell(self, serial, command, timeout=10):
+        """Run a shell command on the device and return its output."""
+        try:
+            sock, pooled = self._checkout(serial, timeout)
+        except AdbError:
+            self.drop(serial)
+            raise
+        try:
+            out = self._shell(sock, command)
+        except (AdbError, OSError) as e:
+            if not pooled or isinstance(e, socket.timeout):
+                raise
+            # A pooled socket can outlive its device or the server; retry once on a fresh one
+            sock.close()
+            sock = self._open_transport(serial, timeout)
+            out = self._shell(sock, command)
+        finally:
+            sock.close()
+        self._request_refill(serial)
+        return out.decode('utf-8', errors='replace').replace('\r\n', '\n')
+
+    def _shell(self, sock, command):
+        self._send(sock, f"shell:{command}")
+        return self._recv_all(sock)
+
+    # ----- adb CLI compatibility -----
+    def run(self, *args, timeout=10):
+        """
+        Execute an adb CLI-style argument list natively.
+        Returns stripped stdout, or None if the command is not supported
+        here and the caller should fall back to the adb binary.
+        """
+        args = list(args)
+        if args == ["devices", "-l"]:
+            return self.devices_l(timeout=timeout).strip()
+        if len(args) >= 3 and args[0] == "-s":
+            serial, verb, rest = args[1], args[2], args[3:]
+            if verb == "shell" and rest:
+                return self.shell(serial, " ".join(rest), timeout=timeout).strip()
+            if verb == "logcat":
+                return self.shell(serial, " ".join(["logcat"] + rest), timeout=timeout).strip()
+        return None
@@ -1,6 +1,12 @@
 import subprocess
 import re
 import os
+import socket
+import threading
+import time
+from functools import lru_cache
+
+from adb_client import AdbClient, AdbError
 
 # Path to adb.exe - will be discovered dynamically
 ADB_PATH = None
@@ -31,6 +37,12 @@ def discover_adb():
 
 ADB_PATH = discover_adb()
 
+# 'socket' talks to the adb server directly; 'subprocess' forks the adb binary
+ADB_BACKEND = os.environ.get('ADB_BACKEND', 'subprocess')
+
+# How long a device's cached process count stays valid for the dashboard
+PROCESS_CACHE_TTL = float(os.environ.get('PROCESS_CACHE_TTL', '120'))
+
 # Known spyware / suspicious package patterns
 SPYWARE_PATTERNS = [
     'com.spy', 'com.hidden', 'com.track', 'com.monitor', 'com.stealth',
@@ -209,6 +221,74 @@ KEYWORD_FRIENDLY = [
     ('privacy', 'Privacy Dashboard'),
 ]
 
+# Lowercased FRIENDLY_NAMES keys for partial tag matches, in dict order
+FRIENDLY_NAMES_LOWER = [(key.lower(), friendly) for key, friendly in FRIENDLY_NAMES.items()]
+
+COMPANY_NAMES = {
+    'google': 'Google', 'samsung': 'Samsung', 'sec': 'Samsung',
+    'android': 'Android', 'facebook': 'Facebook', 'meta': 'Meta',
+    'whatsapp': 'WhatsApp', 'instagram': 'Instagram',
+    'microsoft': 'Microsoft', 'apple': 'Apple',
+}
+
+CAMEL_SPLIT_RE = re.compile(r'([a-z])([A-Z])')
+ACRONYM_SPLIT_RE = re.compile(r'([A-Z]+)([A-Z][a-z])')
+
+# Distinct tags remembered by resolve_friendly_name
+FRIENDLY_CACHE_SIZE = int(os.environ.get('FRIENDLY_CACHE_SIZE', '4096'))
+
+
+@lru_cache(maxsize=FRIENDLY_CACHE_SIZE)
+def resolve_friendly_name(tag):
+    """Convert raw logcat tag to a human-readable name (memoized per tag)."""
+    # 1. Exact match in dictionary
+    if tag in FRIENDLY_NAMES:
+        return FRIENDLY_NAMES[tag]
+
+    tag_lower = tag.lower()
+
+    # 2. Partial match (for tags like ORC/something)
+    for key_lower, friendly in FRIENDLY_NAMES_LOWER:
+        if key_lower in tag_lower:
+            return friendly
+
+    # 3. Package name pattern (com.example.app → App)
+    if '.' in tag and tag.count('.') >= 2:
+        parts = tag.split('.')
+        name = parts[-1]
+        company = ''
+        for part in parts:
+            if part.lower() in COMPANY_NAMES:
+                company = COMPANY_NAMES[part.lower()] + ' '
+                break
+        clean = CAMEL_SPLIT_RE.sub(r'\1 \2', name)
+        clean = clean.replace('_', ' ').title()
+        return f'{company}{clean}'.strip()
+
+    # 4. Keyword-based fallback
+    for keyword, friendly in KEYWORD_FRIENDLY:
+        if keyword in tag_lower:
+            return friendly
+
+    # 5. CamelCase split + cleanup
+    clean = CAMEL_SPLIT_RE.sub(r'\1 \2', tag)
+    clean = ACRONYM_SPLIT_RE.sub(r'\1 \2', clean)
+    clean = clean.replace('_', ' ').replace('/', ' ').replace(':', ' ')
+    clean = ' '.join(w.capitalize() for w in clean.split())
+    return clean
+
+
+def friendly_name_cache_stats():
+    """Hit/miss counters for the tag -> friendly name cache."""
+    info = resolve_friendly_name.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        'hits': info.hits, 'misses': info.misses,
+        'size': info.currsize, 'maxSize': info.maxsize,
+        'hitRate': round(info.hits / lookups, 4) if lookups else 0.0,
+    }
+
+
 # Sensitive app categories for time-window enforcement
 SENSITIVE_APPS = {
     'gallery': ['com.google.android.apps.photos', 'com.sec.android.gallery3d',
@@ -224,6 +304,91 @@ SENSITIVE_APPS = {
                      'com.mi.android.globalFileexplorer'],
 }
 
+# Logcat brief format: "E/Tag( 1234): message"
+LOGCAT_BRIEF_RE = re.compile(r'^([VDIWEF])/(\S+)\s*\(\s*(\d+)\):\s*(.+)$')
+
+# Logcat threadtime format: "10-16 23:19:59.627  1234  1250 E Tag     : message"
+LOGCAT_THREADTIME_RE = re.compile(
+    r'^(\d\d-\d\d \d\d:\d\d:\d\d\.\d+)\s+(\d+)\s+(\d+)\s+([VDIWEF])\s+(.+?)\s*: (.+)$')
+
+# ActivityTaskManager (ActivityManager before Android 10) lines that mark
+# a new foreground activity:
+#   "START u0 {act=android.intent.action.MAIN flg=0x10200000 cmp=com.example/.MainActivity} from uid 10123"
+#   "Displayed com.example/.MainActivity: +412ms"
+ACTIVITY_TAGS = frozenset({'ActivityTaskManager', 'ActivityManager'})
+ACTIVITY_START_RE = re.compile(r'^START u\d+ \{.*?\bcmp=([\w.]+)/([\w.$]+)')
+ACTIVITY_DISPLAYED_RE = re.compile(r'^Displayed ([\w.]+)/([\w.$]+)')
+
+# Lines that mean a package was installed, updated or removed, e.g.
+#   PackageInstallerSession "Committing session 123: file /data/app/vmdl123.tmp"
+#   ActivityManager "Force stopping com.example appid=10123 user=-1: pkg removed"
+#   PackageManager "installPackageLI: ..." / "Removing package com.example"
+PACKAGE_EVENT_TAGS = frozenset({'PackageManager', 'PackageInstallerSession', 'PackageInstaller',
+                                'InstallPackageHelper', 'RemovePackageHelper',
+                                'ActivityManager', 'ActivityTaskManager'})
+PACKAGE_EVENT_RE = re.compile(
+    r'pkg removed|uninstall pkg|installPackageLI|deletePackage|[Cc]ommitting session'
+    r'|(?:[Ii]nstall|[Rr]emov|[Uu]pdat|[Rr]eplac)(?:e|es|ed|ing) package|codePath changed')
+
+SEVERITY_MAP = {
+    'V': 'LOW', 'D': 'LOW', 'I': 'LOW',
+    'W': 'MEDIUM', 'E': 'CRITICAL', 'F': 'CRITICAL',
+}
+
+# Event classification keywords, highest priority first.
+# Message rules are checked before tag rules.
+MESSAGE_EVENT_RULES = [
+    ('Permission Update', ['permission', 'grant', 'deny', 'revoke']),
+    ('Network Request', ['network', 'socket', 'connect', 'http', 'dns']),
+    ('File Access', ['file', 'open', 'read', 'write', 'storage']),
+    ('Camera Access', ['camera']),
+    ('Microphone Access', ['microphone', 'audio', 'record']),
+    ('Location Query', ['location', 'gps', 'geofence']),
+    ('SMS Access', ['sms', 'message', 'telephony']),
+    ('Auth Attempt', ['auth', 'login', 'password', 'credential']),
+    ('Crash/ANR', ['crash', 'exception', 'fatal', 'anr']),
+    ('Process Event', ['process', 'fork', 'exec', 'kill']),
+]
+TAG_EVENT_RULES = [
+    ('Activity Lifecycle', ['activity', 'activitymanager']),
+    ('Package Event', ['packagemanager', 'install']),
+]
+
+
+class KeywordClassifier:
+    """
+    Priority-ordered substring matcher compiled into one alternation regex.
+    Alternatives are listed in priority order, so at any position the regex
+    reports the highest-priority keyword starting there; restarting the
+    search one character later also catches keywords that overlap a match.
+    """
+
+    def __init__(self, rules):
+        self.ranks = {}
+        for rank, (label, keywords) in enumerate(rules):
+            for kw in keywords:
+                self.ranks.setdefault(kw, (rank, label))
+        ordered = sorted(self.ranks, key=lambda kw: self.ranks[kw][0])
+        self.pattern = re.compile('|'.join(re.escape(kw) for kw in ordered))
+
+    def classify(self, text):
+        """Return the label of the highest-priority keyword in text, or None."""
+        best = None
+        search = self.pattern.search
+        match = search(text)
+        while match:
+            rank, label = self.ranks[match.group()]
+            if best is None or rank < best[0]:
+                best = (rank, label)
+                if rank == 0:
+                    break
+            match = search(text, match.start() + 1)
+        return best[1] if best else None
+
+
+MESSAGE_CLASSIFIER = KeywordClassifier(MESSAGE_EVENT_RULES)
+TAG_CLASSIFIER = KeywordClassifier(TAG_EVENT_RULES)
+
 
 class ADBMonitor:
     """Connects to real Android devices using the local adb binary."""
@@ -233,10 +398,26 @@ class ADBMonitor:
         if not os.path.exists(self.adb):
             print(f"[ADB] WARNING: adb.exe not found at {self.adb}")
             self.adb = "adb"  # Fallback to PATH
+        self.client = AdbClient() if ADB_BACKEND == 'socket' else None
+        self._telemetry = {}  # serial -> {'process_count', 'updated'}
+        self._telemetry_lock = threading.Lock()
         self._start_server()
 
     def _run(self, *args, timeout=10):
         """Run an adb command and return stdout."""
+        if self.client:
+            try:
+                out = self.client.run(*args, timeout=timeout)
+                if out is not None:
+                    return out
+            except AdbError as e:
+                print(f"[ADB] {' '.join(args[:3])}: {e}")
+                return ""
+            except socket.timeout:
+                return ""
+            except OSError:
+                pass  # adb server not reachable; the binary will start it
+
         cmd = [self.adb] + list(args)
         try:
             result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
@@ -294,19 +475,6 @@ class ADBMonitor:
         return devices
 
     # ===== Layer 2: Data Acquisition =====
-    def get_logcat(self, serial, lines=20):
-        """Get the latest N logcat lines from a device (real data)."""
-        raw = self._run("-s", serial, "logcat", "-d", "-v", "brief", "-t", str(lines), timeout=8)
-        if not raw:
-            return []
-
-        entries = []
-        for line in raw.splitlines():
-            parsed = self._parse_logcat_line(line)
-            if parsed:
-                entries.append(parsed)
-        return entries
-
     def get_foreground_app(self, serial):
         """Get the currently visible foreground app using dumpsys activity."""
         # Try mResumedActivity first (Android 10+)
@@ -316,14 +484,7 @@ class ADBMonitor:
             # Pattern: mResumedActivity: ActivityRecord{... com.example.app/.MainActivity ...}
             match = re.search(r'(\S+)/(\S+)', raw)
             if match:
-                package = match.group(1)
-                activity = match.group(2)
-                return {
-                    'package': package,
-                    'activity': activity,
-                    'label': self._get_app_label(serial, package),
-                    'category': self._categorize_app(package),
-                }
+                return self.describe_foreground(serial, match.group(1), match.group(2))
 
         # Fallback: try mCurrentFocus
         raw2 = self._run("-s", serial, "shell",
@@ -331,17 +492,33 @@ class ADBMonitor:
         if raw2:
             match = re.search(r'(\S+)/(\S+)', raw2)
             if match:
-                package = match.group(1)
-                activity = match.group(2)
-                return {
-                    'package': package,
-                    'activity': activity,
-                    'label': self._get_app_label(serial, package),
-                    'category': self._categorize_app(package),
-                }
+                return self.describe_foreground(serial, match.group(1), match.group(2))
 
         return None
 
+    def describe_foreground(self, serial, package, activity):
+        """Foreground info dict for a package/activity pair."""
+        return {
+            'package': package,
+            'activity': activity,
+            'label': self._get_app_label(serial, package),
+            'category': self._categorize_app(package),
+        }
+
+    def parse_foreground_event(self, tag, message):
+        """
+        (package, activity) if a logcat line reports an activity coming to
+        the foreground, else None.
+        """
+        if tag not in ACTIVITY_TAGS:
+            return None
+        match = ACTIVITY_START_RE.match(message) or ACTIVITY_DISPLAYED_RE.match(message)
+        return match.groups() if match else None
+
+    def is_package_event(self, tag, message):
+        """True if a logcat line reports a package install, update or removal."""
+        return tag in PACKAGE_EVENT_TAGS and PACKAGE_EVENT_RE.search(message) is not None
+
     def get_running_processes(self, serial):
         """Get list of running processes with PID and user."""
         raw = self._run("-s", serial, "shell", "ps -A -o PID,USER,NAME", timeout=10)
@@ -357,33 +534,41 @@ class ADBMonitor:
                     'user': parts[1],
                     'name': parts[2],
                 })
+
+        with self._telemetry_lock:
+            self._telemetry[serial] = {
+                'process_count': len(processes), 'updated': time.monotonic(),
+            }
         return processes
 
-    def get_installed_packages(self, serial):
-        """Get all installed packages for spyware scanning."""
+    def get_process_counts(self, ttl=PROCESS_CACHE_TTL):
+        """Cached process counts per device from the last get_running_processes."""
+        cutoff = time.monotonic() - ttl
+        with self._telemetry_lock:
+            return {serial: t['process_count'] for serial, t in self._telemetry.items()
+                    if t['updated'] >= cutoff}
+
+    def list_installed_packages(self, serial):
+        """
+        Installed packages as [{'package', 'path'}], unclassified.
+        Returns None if the listing failed, so callers can tell it apart
+        from an empty device.
+        """
         raw = self._run("-s", serial, "shell", "pm list packages -f", timeout=15)
         if not raw:
-            return []
+            return None
 
         packages = []
         for line in raw.splitlines():
+            line = line.strip()
+            if not line.startswith('package:'):
+                continue
             # Format: package:/data/app/com.example-xyz==/base.apk=com.example
-            match = re.match(r'package:(.+?)=(.+)', line)
-            if match:
-                packages.append({
-                    'path': match.group(1),
-                    'package': match.group(2),
-                    'is_suspicious': self._is_suspicious_package(match.group(2)),
-                })
-            else:
-                # Simpler format: package:com.example
-                cleaned = line.replace('package:', '').strip()
-                if cleaned:
-                    packages.append({
-                        'path': '',
-                        'package': cleaned,
-                        'is_suspicious': self._is_suspicious_package(cleaned),
-                    })
+            # or without -f: package:com.example. The path may itself
+            # contain '=', the package name never does.
+            path, _, package = line[len('package:'):].rpartition('=')
+            if package:
+                packages.append({'path': path, 'package': package})
         return packages
 
     def get_battery_stats(self, serial):
@@ -399,20 +584,19 @@ class ADBMonitor:
 
     # ===== Parsing & Classification =====
     def _parse_logcat_line(self, line):
-        """Parse a logcat brief line into structured data."""
-        match = re.match(r'^([VDIWEF])/(\S+)\s*\(\s*\d+\):\s*(.+)$', line)
-        if not match:
-            return None
-
-        level = match.group(1)
-        tag = match.group(2)
-        message = match.group(3).strip()
-
-        severity_map = {
-            'V': 'LOW', 'D': 'LOW', 'I': 'LOW',
-            'W': 'MEDIUM', 'E': 'CRITICAL', 'F': 'CRITICAL',
-        }
-        severity = severity_map.get(level, 'LOW')
+        """Parse a logcat threadtime or brief line into structured data."""
+        match = LOGCAT_THREADTIME_RE.match(line)
+        if match:
+            logcat_time, pid, tid, level, tag, message = match.groups()
+        else:
+            match = LOGCAT_BRIEF_RE.match(line)
+            if not match:
+                return None
+            level, tag, pid, message = match.groups()
+            logcat_time = tid = None
+        message = message.strip()
+
+        severity = SEVERITY_MAP.get(level, 'LOW')
         event_type = self._classify_event(tag, message)
 
         return {
@@ -420,82 +604,22 @@ class ADBMonitor:
             'event_type': event_type,
             'severity': severity,
             'raw': line,
+            'tag': tag,
+            'message': message,
+            'pid': pid,
+            'tid': tid,
+            'logcat_time': logcat_time,
         }
 
     def _friendly_name(self, tag):
         """Convert raw logcat tag to a human-readable name."""
-        # 1. Exact match in dictionary
-        if tag in FRIENDLY_NAMES:
-            return FRIENDLY_NAMES[tag]
-
-        tag_lower = tag.lower()
-
-        # 2. Partial match (for tags like ORC/something)
-        for key, friendly in FRIENDLY_NAMES.items():
-            if key.lower() in tag_lower:
-                return friendly
-
-        # 3. Package name pattern (com.example.app → App)
-        if '.' in tag and tag.count('.') >= 2:
-            parts = tag.split('.')
-            name = parts[-1]
-            company_map = {
-                'google': 'Google', 'samsung': 'Samsung', 'sec': 'Samsung',
-                'android': 'Android', 'facebook': 'Facebook', 'meta': 'Meta',
-                'whatsapp': 'WhatsApp', 'instagram': 'Instagram',
-                'microsoft': 'Microsoft', 'apple': 'Apple',
-            }
-            company = ''
-            for part in parts:
-                if part.lower() in company_map:
-                    company = company_map[part.lower()] + ' '
-                    break
-            clean = re.sub(r'([a-z])([A-Z])', r'\1 \2', name)
-            clean = clean.replace('_', ' ').title()
-            return f'{company}{clean}'.strip()
-
-        # 4. Keyword-based fallback
-        for keyword, friendly in KEYWORD_FRIENDLY:
-            if keyword in tag_lower:
-                return friendly
-
-        # 5. CamelCase split + cleanup
-        clean = re.sub(r'([a-z])([A-Z])', r'\1 \2', tag)
-        clean = re.sub(r'([A-Z]+)([A-Z][a-z])', r'\1 \2', clean)
-        clean = clean.replace('_', ' ').replace('/', ' ').replace(':', ' ')
-        clean = ' '.join(w.capitalize() for w in clean.split())
-        return clean
+        return resolve_friendly_name(tag)
 
     def _classify_event(self, tag, message):
         """Classify a logcat entry into a forensic event type."""
-        msg_lower = message.lower()
-        tag_lower = tag.lower()
-
-        if any(k in msg_lower for k in ['permission', 'grant', 'deny', 'revoke']):
-            return 'Permission Update'
-        if any(k in msg_lower for k in ['network', 'socket', 'connect', 'http', 'dns']):
-            return 'Network Request'
-        if any(k in msg_lower for k in ['file', 'open', 'read', 'write', 'storage']):
-            return 'File Access'
-        if any(k in msg_lower for k in ['camera']):
-            return 'Camera Access'
-        if any(k in msg_lower for k in ['microphone', 'audio', 'record']):
-            return 'Microphone Access'
-        if any(k in msg_lower for k in ['location', 'gps', 'geofence']):
-            return 'Location Query'
-        if any(k in msg_lower for k in ['sms', 'message', 'telephony']):
-            return 'SMS Access'
-        if any(k in msg_lower for k in ['auth', 'login', 'password', 'credential']):
-            return 'Auth Attempt'
-        if any(k in msg_lower for k in ['crash', 'exception', 'fatal', 'anr']):
-            return 'Crash/ANR'
-        if any(k in msg_lower for k in ['process', 'fork', 'exec', 'kill']):
-            return 'Process Event'
-        if any(k in tag_lower for k in ['activity', 'activitymanager']):
-            return 'Activity Lifecycle'
-        if any(k in tag_lower for k in ['packagemanager', 'install']):
-            return 'Package Event'
-        return 'System Event'
+        return (MESSAGE_CLASSIFIER.classify(message.lower())
+                or TAG_CLASSIFIER.classify(tag.lower())
+                or 'System Event')
 
     def _get_app_label(self, serial, package):
         """Try to get a human-readable app label from package name."""
@@ -0,0 +1,72 @@
+"""
+Open-alert de-duplication for the threat scans.
+Each spyware/process alert carries a fingerprint of (device, type, package).
+A partial unique index allows only one unresolved alert per fingerprint,
+and OpenAlertIndex keeps those fingerprints in memory so "already reported?"
+needs no query.
+"""
+import hashlib
+import os
+import time
+
+from sqlalchemy.exc import IntegrityError
+
+
+# Re-read open fingerprints so alerts resolved outside the app can fire again
+ALERT_INDEX_REFRESH_SECONDS = float(os.environ.get('ALERT_INDEX_REFRESH_SECONDS', '300'))
+
+
+def alert_fingerprint(device_id, alert_type, package):
+    """Stable identity of a threat on a device, independent of PID or wording."""
+    key = f'{device_id}|{alert_type}|{package or ""}'
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+class OpenAlertIndex:
+    """In-memory set of fingerprints that have an unresolved Alert."""
+
+    def __init__(self, db, Alert, refresh_every=ALERT_INDEX_REFRESH_SECONDS):
+        self.db = db
+        self.Alert = Alert
+        self.refresh_every = refresh_every
+        self._open = set()
+        self._loaded_at = None
+        self.conflicts = 0
+
+    def refresh(self):
+        """Reload the open fingerprints from the database."""
+        Alert = self.Alert
+        rows = self.db.session.query(Alert.fingerprint) \
+            .filter(Alert.resolved == False, Alert.fingerprint.isnot(None)).all()
+        self._open = {fingerprint for fingerprint, in rows}
+        self._loaded_at = time.monotonic()
+
+    def _maybe_refresh(self):
+        if self._loaded_at is None or time.monotonic() - self._loaded_at >= self.refresh_every:
+            self.refresh()
+
+    def __contains__(self, fingerprint):
+        self._maybe_refresh()
+        return fingerprint in self._open
+
+    def __len__(self):
+        return len(self._open)
+
+    def create(self, fingerprint, **fields):
+        """
+        Insert and commit an open Alert for fingerprint.
+        Returns the Alert, or None if another writer already holds an open
+        alert for it (the unique index rejected the insert).
+        """
+        session = self.db.session
+        alert = self.Alert(fingerprint=fingerprint, **fields)
+        try:
+            with session.begin_nested():
+                session.add(alert)
+        except IntegrityError:
+            self.conflicts += 1
+            self._open.add(fingerprint)
+            return None
+        session.commit()
+        self._open.add(fingerprint)
+        return alert
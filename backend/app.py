@@ -1,18 +1,35 @@
 import os
 import io
+import atexit
+import csv
+import json
+import base64
+import time
 from datetime import datetime
-from flask import Flask, jsonify, send_file, request
+from flask import Flask, Response, jsonify, send_file, request, stream_with_context
 from flask_socketio import SocketIO, emit
 from flask_cors import CORS
-from fpdf import FPDF
 import models as m
-from models import db, AndroidDevice, ActivityLog, Alert, Baseline, ForegroundSnapshot
-from adb_monitor import adb_monitor
+from models import db, AndroidDevice, ActivityLog, Alert, Baseline, ForegroundSession
+from adb_monitor import adb_monitor, friendly_name_cache_stats
+from logcat_stream import logcat_streams
+from device_pool import DevicePoller
+from ingest import LogIngestor
+from dedup import DedupWindow
+from alert_index import OpenAlertIndex, alert_fingerprint
+from foreground_sessions import ForegroundSessionRecorder, expand_sessions, sessions_in_range
+from package_inventory import PackageInventory
+from live_stats import StatsCounters, ThreatTracker, ThreatWindow
+from db_snapshot import (sqlite_snapshot_in_background, iter_file, remove_snapshot,
+                         pg_dump_available, pg_dump_stream, gzip_stream)
+from archive import LogArchiver, ARCHIVE_DIR, ARCHIVE_INTERVAL_SECONDS, is_available as archive_available
+from reports import (ReportJobs, build_forensic_report, TIMELINE_COLUMNS, REPORT_DIR, REPORT_MAX_EVENTS,
+                     REPORT_WAIT_SECONDS)
 from behavior_engine import BehaviorEngine
-from email_notifier import send_alert_email, is_configured as email_configured
+from email_notifier import notifier, send_alert_email, is_configured as email_configured
 
 app = Flask(__name__, static_folder='static', static_url_path='/')
-CORS(app)
+CORS(app, expose_headers=['X-Next-Cursor'])
 
 @app.route('/')
 def serve_index():
@@ -69,6 +86,8 @@ def background_mock_stream():
                                        description=f"Demo: Critical {event_choice} in {app_choice}", 
                                        severity='CRITICAL'))
                 db.session.commit()
+                stats_counters.record(logs=1, alerts=int(severity == 'CRITICAL'))
+                threat_tracker.record(device.id, severity == 'CRITICAL')
                 
                 socketio.emit('new_log', {
                     'id': log.id, 'timestamp': now.isoformat() + 'Z',
@@ -84,9 +103,19 @@ def background_mock_stream():
                 print(f"Mock error: {e}")
             socketio.sleep(random.randint(2, 5))
 
-last_seen_raw = set()
+dedup_windows = {}  # serial -> DedupWindow
+stats_counters = StatsCounters()
+threat_tracker = ThreatTracker()
+open_alerts = OpenAlertIndex(db, Alert)
+foreground_sessions = ForegroundSessionRecorder(db, ForegroundSession)
+package_inventory = PackageInventory(adb_monitor._is_suspicious_package)
+log_archiver = LogArchiver(db, ActivityLog, Alert, ARCHIVE_DIR or os.path.join(app.instance_path, 'archive'))
 behavior_engine = None  # Initialized after app context
 
+log_ingestor = LogIngestor(db, ActivityLog, Alert)
+foreground_poller = DevicePoller('foreground', sleep=socketio.sleep)
+behavior_poller = DevicePoller('behavior', sleep=socketio.sleep)
+
 # ===== Device Discovery =====
 def sync_real_devices():
     real_devices = adb_monitor.get_devices()
@@ -107,41 +136,54 @@ def sync_real_devices():
                     last_seen=datetime.utcnow(),
                 ))
         db.session.commit()
+        stats_counters.set_online_devices(sum(d['status'] == 'online' for d in real_devices))
         return True
     else:
         db.session.commit()
+        stats_counters.set_online_devices(0)
         return False
 
-def compute_stats():
-    total_logs = ActivityLog.query.count()
-    alert_count = Alert.query.filter_by(resolved=False).count()
-    online_devices = AndroidDevice.query.filter_by(status='online').count()
-    recent_critical = ActivityLog.query.filter_by(severity='CRITICAL').limit(50).count()
-    if total_logs == 0:
-        threat = 'LOW'
-    else:
-        ratio = recent_critical / min(total_logs, 50)
-        if ratio > 0.4: threat = 'CRITICAL'
-        elif ratio > 0.25: threat = 'HIGH'
-        elif ratio > 0.1: threat = 'ELEVATED'
-        else: threat = 'LOW'
-
-    active_procs = 0
-    devices = AndroidDevice.query.filter_by(status='online').all()
-    if devices:
-        try:
-            output = adb_monitor._run("-s", devices[0].serial, "shell",
-                                       "ps -A | wc -l", timeout=5)
-            if output.strip().isdigit():
-                active_procs = int(output.strip())
-        except:
-            pass
+def reconcile_stats():
+    """Re-sync the in-memory counters with real table counts."""
+    stats_counters.reconcile(
+        total_logs=ActivityLog.query.count() + log_archiver.archived_row_count(),
+        unresolved_alerts=Alert.query.filter_by(resolved=False).count(),
+        online_devices=AndroidDevice.query.filter_by(status='online').count(),
+    )
+
+def compute_stats(reconcile=True):
+    """
+    Dashboard totals from the in-memory counters. reconcile=False skips the
+    periodic re-count, for callers off the main loop (report workers).
+    """
+    if reconcile and stats_counters.needs_reconcile():
+        reconcile_stats()
+    counters = stats_counters.snapshot()
+    total_logs = counters['total_logs']
+    alert_count = counters['unresolved_alerts']
+    online_devices = counters['online_devices']
+
+    threat = threat_tracker.snapshot()
+    # Filled by the behavior analyzer's process scans; never blocks on adb
+    process_counts = adb_monitor.get_process_counts()
+    active_procs = sum(process_counts.values())
+
+    idle = ThreatWindow().snapshot()
+    per_device = {}
+    for d in AndroidDevice.query.filter_by(status='online').all():
+        window = threat['devices'].get(d.id, idle)
+        per_device[d.serial] = {
+            'threatLevel': window['threatLevel'],
+            'criticalRatio': window['criticalRatio'],
+            'activeProcesses': process_counts.get(d.serial),
+        }
 
     return {
         'totalLogs': total_logs, 'activeProcesses': active_procs,
-        'threatLevel': threat, 'alert_count': alert_count,
+        'threatLevel': threat['global']['threatLevel'], 'alert_count': alert_count,
         'onlineDevices': online_devices,
         'emailConfigured': email_configured(),
+        'devices': per_device,
     }
 
 # ===== API Routes =====
@@ -163,29 +205,168 @@ def refresh_devices():
         'devices': [{'id': d.id, 'serial': d.serial, 'model': d.model, 'status': d.status} for d in devices]
     })
 
+# ===== Query Helpers =====
+MAX_PAGE_SIZE = 1000
+
+def parse_time_arg(name):
+    """Read an ISO-8601 UTC timestamp query argument (trailing Z allowed)."""
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.rstrip('Z'))
+    except ValueError:
+        raise ValueError(f"'{name}' must be an ISO-8601 timestamp")
+
+def encode_cursor(ts, row_id):
+    return base64.urlsafe_b64encode(f'{ts.isoformat()}|{row_id}'.encode()).decode()
+
+def decode_cursor(cursor):
+    try:
+        ts, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(ts), int(row_id)
+    except Exception:
+        raise ValueError("invalid cursor")
+
+def keyset_page(query, ts_col, id_col, default_limit):
+    """
+    Newest-first page of `query` continuing after the `cursor` argument.
+    Seeks on (timestamp, id) so every page costs the same as the first.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    limit = max(1, min(request.args.get('limit', default_limit, type=int), MAX_PAGE_SIZE))
+    cursor = request.args.get('cursor')
+    if cursor:
+        ts, last_id = decode_cursor(cursor)
+        # The redundant ts_col <= ts bound lets the index seek instead of scan
+        query = query.filter(ts_col <= ts,
+                             db.or_(ts_col < ts, db.and_(ts_col == ts, id_col < last_id)))
+    rows = query.order_by(ts_col.desc(), id_col.desc()).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    last = rows[limit - 1]
+    return rows[:limit], encode_cursor(getattr(last, ts_col.key), last.id)
+
+def paged_response(items, next_cursor):
+    response = jsonify(items)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
+
+def log_filters():
+    """Parse the shared device/severity/app/time filters from the query string."""
+    severity = request.args.get('severity')
+    return {
+        'device_id': request.args.get('device_id', type=int),
+        'severities': severity.upper().split(',') if severity else None,
+        'app_name': request.args.get('app') or None,
+        'since': parse_time_arg('since'),
+        'until': parse_time_arg('until'),
+    }
+
+def filter_logs(query, filters):
+    """Apply log_filters() to an ActivityLog query."""
+    if filters['device_id'] is not None:
+        query = query.filter(ActivityLog.device_id == filters['device_id'])
+    if filters['severities']:
+        query = query.filter(ActivityLog.severity.in_(filters['severities']))
+    if filters['app_name']:
+        query = query.filter(ActivityLog.app_name == filters['app_name'])
+    if filters['since']:
+        query = query.filter(ActivityLog.timestamp >= filters['since'])
+    if filters['until']:
+        query = query.filter(ActivityLog.timestamp < filters['until'])
+    return query
+
 @app.route('/api/logs')
 def get_logs():
-    logs = ActivityLog.query.order_by(ActivityLog.timestamp.desc()).limit(100).all()
-    return jsonify([{
+    """Newest logs first; filters: device_id, severity, app, since, until; paging: limit, cursor."""
+    try:
+        logs, next_cursor = keyset_page(filter_logs(ActivityLog.query, log_filters()),
+                                        ActivityLog.timestamp, ActivityLog.id, 100)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return paged_response([{
         'id': l.id,
+        'device_id': l.device_id,
         'timestamp': l.timestamp.isoformat() + 'Z',
         'app_name': l.app_name, 'event_type': l.event_type,
         'severity': l.severity, 'is_anomaly': l.is_anomaly,
-    } for l in logs])
+    } for l in logs], next_cursor)
 
 @app.route('/api/alerts')
 def get_alerts():
-    alerts = Alert.query.order_by(Alert.created_at.desc()).limit(50).all()
-    return jsonify([{
+    """Newest alerts first; filters: resolved, severity, since, until; paging: limit, cursor."""
+    query = Alert.query
+    try:
+        resolved = request.args.get('resolved')
+        if resolved is not None:
+            query = query.filter(Alert.resolved == (resolved.lower() in ('1', 'true', 'yes')))
+        severity = request.args.get('severity')
+        if severity:
+            query = query.filter(Alert.severity.in_(severity.upper().split(',')))
+        since, until = parse_time_arg('since'), parse_time_arg('until')
+        if since:
+            query = query.filter(Alert.created_at >= since)
+        if until:
+            query = query.filter(Alert.created_at < until)
+        alerts, next_cursor = keyset_page(query, Alert.created_at, Alert.id, 50)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return paged_response([{
         'id': a.id, 'alert_type': a.alert_type, 'description': a.description,
         'created_at': a.created_at.isoformat(), 'resolved': a.resolved,
         'severity': a.severity,
-    } for a in alerts])
+    } for a in alerts], next_cursor)
 
 @app.route('/api/stats')
 def get_stats():
     return jsonify(compute_stats())
 
+@app.route('/api/metrics')
+def get_metrics():
+    """Ingestion pipeline internals for capacity tuning."""
+    return jsonify({
+        'friendlyNameCache': friendly_name_cache_stats(),
+        'logcatStreams': logcat_streams.stats(),
+        'logcatDropped': logcat_streams.dropped_total(),
+        'ingest': log_ingestor.stats(),
+        'dedup': {serial: w.stats() for serial, w in dedup_windows.items()},
+        'email': notifier.stats(),
+        'openAlertIndex': {'size': len(open_alerts), 'conflicts': open_alerts.conflicts},
+        'foregroundSessions': foreground_sessions.stats(),
+        'packageInventory': package_inventory.stats(),
+    })
+
+@app.route('/api/foreground')
+def get_foreground_history():
+    """
+    Foreground history, oldest first; filters: device_id, since, until.
+    Returns sessions by default; ?expand=samples returns one point per
+    recorded sample in the old ForegroundSnapshot shape.
+    """
+    try:
+        device_id = request.args.get('device_id', type=int)
+        since, until = parse_time_arg('since'), parse_time_arg('until')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    limit = max(1, min(request.args.get('limit', 500, type=int), MAX_PAGE_SIZE))
+    sessions = sessions_in_range(ForegroundSession, device_id, since, until)
+    if request.args.get('expand') == 'samples':
+        samples = []
+        for sample in expand_sessions(sessions.yield_per(500), since, until):
+            sample['timestamp'] = sample['timestamp'].isoformat() + 'Z'
+            samples.append(sample)
+            if len(samples) >= limit:
+                break
+        return jsonify(samples)
+    return jsonify([{
+        'id': s.id, 'device_id': s.device_id, 'package_name': s.package_name,
+        'app_label': s.app_label, 'category': s.category,
+        'started_at': s.started_at.isoformat() + 'Z', 'ended_at': s.ended_at.isoformat() + 'Z',
+        'sample_count': s.sample_count,
+    } for s in sessions.limit(limit)])
+
 @app.route('/api/baseline')
 def get_baseline():
     device = AndroidDevice.query.filter_by(status='online').first()
@@ -196,9 +377,14 @@ def get_baseline():
 
 @app.route('/api/baseline/configure', methods=['POST'])
 def configure_baseline():
-    data = request.json
-    device_id = data.get('device_id')
+    data = request.get_json(silent=True) or {}
+    try:
+        device_id = int(data.get('device_id'))
+    except (TypeError, ValueError):
+        return jsonify({'error': "'device_id' must be an integer"}), 400
     app_name = data.get('app_name')
+    if not app_name:
+        return jsonify({'error': "'app_name' is required"}), 400
     is_whitelisted = data.get('is_whitelisted', True)
     start_hour = data.get('start_hour', 9)
     end_hour = data.get('end_hour', 18)
@@ -215,6 +401,8 @@ def configure_baseline():
             typical_start_hour=start_hour, typical_end_hour=end_hour,
         ))
     db.session.commit()
+    if behavior_engine:
+        behavior_engine.invalidate_baseline(device_id)
     return jsonify({'status': 'ok'})
 
 @app.route('/api/anomalies')
@@ -231,178 +419,210 @@ def get_anomalies():
 # ===== Export Endpoints =====
 @app.route('/api/export/sqlite')
 def export_sqlite():
-    db_path = os.path.join(app.instance_path, 'adb_forensics.db')
-    if os.path.exists(db_path):
-        return send_file(db_path, as_attachment=True,
-                        download_name=f'adb_forensics_{datetime.utcnow().strftime("%Y%m%d_%H%M%S")}.db',
-                        mimetype='application/x-sqlite3')
-    return jsonify({'error': 'Database file not found'}), 404
+    """
+    Download a consistent snapshot of the database (?compress=gzip to gzip it).
+    SQLite databases are copied via the backup API first; PostgreSQL
+    deployments get a pg_dump custom-format archive.
+    """
+    compress = request.args.get('compress', '').lower() == 'gzip'
+    url = db.engine.url
+    stamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+    snapshot = None
+
+    if url.get_backend_name() == 'sqlite':
+        db_path = url.database
+        if not db_path or db_path == ':memory:' or not os.path.exists(db_path):
+            return jsonify({'error': 'Database file not found'}), 404
+        snapshot = sqlite_snapshot_in_background(db_path, sleep=socketio.sleep)
+        chunks = iter_file(snapshot)
+        name, mimetype = f'adb_forensics_{stamp}.db', 'application/x-sqlite3'
+    elif url.get_backend_name() == 'postgresql':
+        if not pg_dump_available():
+            return jsonify({'error': 'pg_dump is not installed on the server'}), 501
+        chunks = pg_dump_stream(url)
+        name, mimetype = f'adb_forensics_{stamp}.dump', 'application/octet-stream'
+    else:
+        return jsonify({'error': f'Export not supported for {url.get_backend_name()}'}), 501
+
+    if compress:
+        chunks = gzip_stream(chunks)
+        name, mimetype = name + '.gz', 'application/gzip'
+    response = Response(chunks, mimetype=mimetype,
+                        headers={'Content-Disposition': f'attachment; filename={name}'})
+    if snapshot:
+        # Runs however the response ends, even if the body was never read
+        response.call_on_close(lambda: remove_snapshot(snapshot))
+    return response
+
+EXPORT_COLUMNS = ['id', 'device_id', 'timestamp', 'app_name', 'event_type',
+                  'severity', 'is_anomaly', 'raw_data']
+EXPORT_CHUNK_ROWS = 2000
+
+def export_row(row):
+    record = dict(zip(EXPORT_COLUMNS, row))
+    record['timestamp'] = record['timestamp'].isoformat() + 'Z' if record['timestamp'] else None
+    return record
+
+@app.route('/api/export/logs')
+def export_logs():
+    """
+    Stream ActivityLog rows oldest first as NDJSON (default) or CSV.
+    Filters: device_id, severity, app, since, until. include_archive=1
+    prepends matching rows from the Parquet archive. Rows are fetched from
+    a server-side cursor in chunks, so memory stays flat for any range.
+    """
+    fmt = request.args.get('format', 'ndjson').lower()
+    if fmt not in ('ndjson', 'csv'):
+        return jsonify({'error': "format must be 'ndjson' or 'csv'"}), 400
+    try:
+        filters = log_filters()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    include_archive = request.args.get('include_archive', '').lower() in ('1', 'true', 'yes')
+    query = filter_logs(db.session.query(*[getattr(ActivityLog, c) for c in EXPORT_COLUMNS]), filters)
+    stmt = query.order_by(ActivityLog.timestamp, ActivityLog.id).statement \
+        .execution_options(yield_per=EXPORT_CHUNK_ROWS)
+
+    def rows():
+        if include_archive:
+            yield from log_archiver.iter_rows(**filters)
+        for chunk in db.session.execute(stmt).partitions():
+            yield from chunk
+
+    def generate():
+        buf = io.StringIO()
+        writer = csv.DictWriter(buf, fieldnames=EXPORT_COLUMNS) if fmt == 'csv' else None
+        if writer:
+            writer.writeheader()
+        for n, row in enumerate(rows(), 1):
+            if writer:
+                writer.writerow(export_row(row))
+            else:
+                buf.write(json.dumps(export_row(row)) + '\n')
+            if n % EXPORT_CHUNK_ROWS == 0:
+                yield buf.getvalue()
+                buf.seek(0)
+                buf.truncate()
+        if buf.tell():
+            yield buf.getvalue()
+
+    ext, mimetype = ('csv', 'text/csv') if fmt == 'csv' else ('ndjson', 'application/x-ndjson')
+    name = f'activity_logs_{datetime.utcnow().strftime("%Y%m%d_%H%M%S")}.{ext}'
+    return Response(stream_with_context(generate()), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename={name}'})
+
+# ===== Forensic Reports =====
+REPORT_ALERT_ROWS = 30
+REPORT_CHUNK_ROWS = 2000
+
+def report_params():
+    """Report scope from the query string: log filters plus the timeline size."""
+    params = log_filters()
+    params['severities'] = tuple(params['severities']) if params['severities'] else None
+    params['limit'] = max(1, min(request.args.get('limit', 200, type=int), REPORT_MAX_EVENTS))
+    return params
+
+def report_version(params):
+    """Cheap fingerprint of everything a report shows besides the live counters."""
+    logs = filter_logs(db.session.query(db.func.count(ActivityLog.id), db.func.max(ActivityLog.id)), params)
+    alerts = db.session.query(db.func.count(Alert.id), db.func.max(Alert.id)).filter(Alert.resolved == False)
+    devices = db.session.query(AndroidDevice.id, AndroidDevice.serial, AndroidDevice.model,
+                               AndroidDevice.os_version, AndroidDevice.status).order_by(AndroidDevice.id)
+    return tuple(logs.one()), tuple(alerts.one()), hash(tuple(map(tuple, devices.all())))
+
+def generate_report(params, path, progress):
+    """
+    Runs on a report worker thread inside an app context. Reconciling the
+    stats counters (table counts, archive footers) is left to the stats
+    emitter; the report takes the counters as they are.
+    """
+    progress(0.01, 'collecting')
+    unresolved = Alert.query.filter_by(resolved=False)
+    # Plain column tuples from a server-side cursor, REPORT_CHUNK_ROWS at a time
+    logs = filter_logs(db.session.query(*[getattr(ActivityLog, c) for c in TIMELINE_COLUMNS]), params) \
+        .order_by(ActivityLog.timestamp.desc(), ActivityLog.id.desc()).limit(params['limit'])
+    log_total = filter_logs(db.session.query(ActivityLog.id), params).limit(params['limit']).count()
+    build_forensic_report(
+        path, datetime.utcnow(), compute_stats(reconcile=False), AndroidDevice.query.all(),
+        unresolved.order_by(Alert.created_at.desc()).limit(REPORT_ALERT_ROWS).all(),
+        unresolved.count(), logs.yield_per(REPORT_CHUNK_ROWS), log_total, progress,
+    )
+
+report_jobs = ReportJobs(app, generate_report, report_version,
+                         REPORT_DIR or os.path.join(app.instance_path, 'reports'))
+
+def watch_report(job):
+    """Relay a job's progress to Socket.IO clients until it finishes."""
+    last = None
+    while True:
+        state = job.to_dict()
+        if (state['status'], state['progress']) != last:
+            socketio.emit('report_progress', state)
+            last = (state['status'], state['progress'])
+        if job.finished:
+            return
+        socketio.sleep(0.5)
+
+def start_report():
+    job, reused = report_jobs.submit(report_params())
+    if reused and job.finished:
+        socketio.emit('report_progress', job.to_dict())
+    elif not reused:
+        socketio.start_background_task(watch_report, job)
+    return job
+
+@app.route('/api/reports', methods=['POST'])
+def create_report():
+    """
+    Queue a forensic PDF report. Scope: device_id, severity, app, since,
+    until and limit (timeline rows, up to REPORT_MAX_EVENTS). Progress is
+    pushed as `report_progress` events; poll /api/reports/<id> otherwise.
+    """
+    try:
+        job = start_report()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(job.to_dict()), 200 if job.status == 'done' else 202
+
+@app.route('/api/reports/<job_id>')
+def report_status(job_id):
+    job = report_jobs.get(job_id)
+    if not job:
+        return jsonify({'error': 'Unknown report'}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/api/reports/<job_id>/download')
+def download_report(job_id):
+    job = report_jobs.get(job_id)
+    if not job:
+        return jsonify({'error': 'Unknown report'}), 404
+    if job.status != 'done':
+        return jsonify(job.to_dict()), 409
+    return send_file(job.path, as_attachment=True, download_name=job.download_name,
+                     mimetype='application/pdf')
 
 @app.route('/api/export/pdf')
 def export_pdf():
-    """Generate a Legal-Ready Digital Forensic Report in PDF format."""
-    stats = compute_stats()
-    logs = ActivityLog.query.order_by(ActivityLog.timestamp.desc()).limit(200).all()
-    devices = AndroidDevice.query.all()
-    alerts = Alert.query.filter_by(resolved=False).all()
-    now = datetime.utcnow()
-
-    pdf = FPDF()
-    pdf.set_auto_page_break(auto=True, margin=15)
-
-    # --- Cover Page ---
-    pdf.add_page()
-    pdf.set_fill_color(10, 17, 24)
-    pdf.rect(0, 0, 210, 297, 'F')
-    pdf.set_font('Helvetica', 'B', 28)
-    pdf.set_text_color(0, 242, 255)
-    pdf.cell(0, 80, '', ln=True)
-    pdf.cell(0, 15, 'DIGITAL FORENSIC REPORT', ln=True, align='C')
-    pdf.set_font('Helvetica', '', 14)
-    pdf.set_text_color(224, 230, 237)
-    pdf.cell(0, 10, 'Enhanced ADB Forensic Monitor', ln=True, align='C')
-    pdf.cell(0, 8, '', ln=True)
-    pdf.set_font('Helvetica', '', 11)
-    pdf.set_text_color(148, 163, 184)
-    pdf.cell(0, 8, f'Generated: {now.strftime("%Y-%m-%d %H:%M:%S UTC")}', ln=True, align='C')
-    pdf.cell(0, 8, f'Classification: CONFIDENTIAL', ln=True, align='C')
-    pdf.cell(0, 8, f'Threat Level: {stats["threatLevel"]}', ln=True, align='C')
-    pdf.cell(0, 40, '', ln=True)
-    pdf.set_font('Helvetica', '', 9)
-    pdf.set_text_color(100, 116, 139)
-    pdf.cell(0, 6, 'This report is generated automatically by the Enhanced ADB Forensic Monitor.', ln=True, align='C')
-    pdf.cell(0, 6, 'All timestamps are in UTC. This document may be used as digital evidence.', ln=True, align='C')
-
-    # --- Executive Summary ---
-    pdf.add_page()
-    pdf.set_fill_color(255, 255, 255)
-    pdf.rect(0, 0, 210, 297, 'F')
-    pdf.set_text_color(0, 0, 0)
-    pdf.set_font('Helvetica', 'B', 18)
-    pdf.cell(0, 12, 'EXECUTIVE SUMMARY', ln=True)
-    pdf.set_draw_color(0, 200, 220)
-    pdf.line(10, pdf.get_y(), 200, pdf.get_y())
-    pdf.cell(0, 6, '', ln=True)
-
-    pdf.set_font('Helvetica', '', 11)
-    summary_items = [
-        f"Report Date: {now.strftime('%B %d, %Y at %H:%M UTC')}",
-        f"Total Logs Captured: {stats['totalLogs']}",
-        f"Active Processes: {stats['activeProcesses']}",
-        f"Unresolved Alerts: {stats['alert_count']}",
-        f"Current Threat Level: {stats['threatLevel']}",
-        f"Online Devices: {stats['onlineDevices']}",
-        f"Email Alerts: {'Configured' if stats['emailConfigured'] else 'Not Configured'}",
-    ]
-    for item in summary_items:
-        pdf.cell(0, 8, f'  * {item}', ln=True)
-
-    # --- Device Inventory ---
-    pdf.cell(0, 10, '', ln=True)
-    pdf.set_font('Helvetica', 'B', 16)
-    pdf.cell(0, 12, 'DEVICE INVENTORY', ln=True)
-    pdf.set_draw_color(0, 200, 220)
-    pdf.line(10, pdf.get_y(), 200, pdf.get_y())
-    pdf.cell(0, 4, '', ln=True)
-
-    pdf.set_font('Helvetica', 'B', 9)
-    pdf.set_fill_color(230, 240, 245)
-    pdf.cell(40, 8, 'STATUS', 1, 0, 'C', fill=True)
-    pdf.cell(50, 8, 'MODEL', 1, 0, 'C', fill=True)
-    pdf.cell(50, 8, 'SERIAL', 1, 0, 'C', fill=True)
-    pdf.cell(45, 8, 'OS VERSION', 1, 1, 'C', fill=True)
-
-    pdf.set_font('Helvetica', '', 9)
-    for d in devices:
-        pdf.cell(40, 7, d.status.upper() if d.status else '-', 1, 0, 'C')
-        pdf.cell(50, 7, (d.model or '-')[:25], 1, 0, 'C')
-        pdf.cell(50, 7, (d.serial or '-')[:25], 1, 0, 'C')
-        pdf.cell(45, 7, (d.os_version or '-')[:20], 1, 1, 'C')
-
-    # --- Alert Summary ---
-    pdf.cell(0, 10, '', ln=True)
-    pdf.set_font('Helvetica', 'B', 16)
-    pdf.cell(0, 12, 'UNRESOLVED ALERTS', ln=True)
-    pdf.set_draw_color(0, 200, 220)
-    pdf.line(10, pdf.get_y(), 200, pdf.get_y())
-    pdf.cell(0, 4, '', ln=True)
-
-    if alerts:
-        pdf.set_font('Helvetica', 'B', 9)
-        pdf.set_fill_color(255, 235, 235)
-        pdf.cell(35, 8, 'SEVERITY', 1, 0, 'C', fill=True)
-        pdf.cell(50, 8, 'TYPE', 1, 0, 'C', fill=True)
-        pdf.cell(100, 8, 'DESCRIPTION', 1, 1, 'C', fill=True)
-
-        pdf.set_font('Helvetica', '', 8)
-        for a in alerts[:30]:
-            pdf.cell(35, 7, (a.severity or 'HIGH'), 1, 0, 'C')
-            pdf.cell(50, 7, (a.alert_type or '-')[:25], 1, 0, 'C')
-            pdf.cell(100, 7, (a.description or '-')[:55], 1, 1)
-    else:
-        pdf.set_font('Helvetica', 'I', 10)
-        pdf.cell(0, 8, 'No unresolved alerts.', ln=True)
-
-    # --- Timeline of Events ---
-    pdf.add_page()
-    pdf.set_font('Helvetica', 'B', 16)
-    pdf.cell(0, 12, 'TIMELINE OF EVENTS (Recent 200)', ln=True)
-    pdf.set_draw_color(0, 200, 220)
-    pdf.line(10, pdf.get_y(), 200, pdf.get_y())
-    pdf.cell(0, 4, '', ln=True)
-
-    pdf.set_font('Helvetica', 'B', 8)
-    pdf.set_fill_color(230, 240, 245)
-    pdf.cell(30, 7, 'TIMESTAMP', 1, 0, 'C', fill=True)
-    pdf.cell(55, 7, 'APP / PROCESS', 1, 0, 'C', fill=True)
-    pdf.cell(55, 7, 'ACTIVITY TYPE', 1, 0, 'C', fill=True)
-    pdf.cell(25, 7, 'SEVERITY', 1, 0, 'C', fill=True)
-    pdf.cell(20, 7, 'ANOMALY', 1, 1, 'C', fill=True)
-
-    pdf.set_font('Helvetica', '', 7)
-    for log in logs:
-        ts = log.timestamp.strftime('%H:%M:%S')
-        app_name = (log.app_name or '-')[:28]
-        event = (log.event_type or '-')[:28]
-        sev = (log.severity or '-')
-        anom = 'YES' if log.is_anomaly else ''
-
-        if log.is_anomaly:
-            pdf.set_fill_color(255, 245, 245)
-            fill = True
-        else:
-            fill = False
-
-        pdf.cell(30, 6, ts, 1, 0, 'C', fill=fill)
-        pdf.cell(55, 6, app_name, 1, 0, '', fill=fill)
-        pdf.cell(55, 6, event, 1, 0, '', fill=fill)
-        pdf.cell(25, 6, sev, 1, 0, 'C', fill=fill)
-        pdf.cell(20, 6, anom, 1, 1, 'C', fill=fill)
-
-    # --- Chain of Custody Footer ---
-    pdf.cell(0, 12, '', ln=True)
-    pdf.set_font('Helvetica', 'B', 12)
-    pdf.cell(0, 10, 'CHAIN OF CUSTODY', ln=True)
-    pdf.set_draw_color(0, 200, 220)
-    pdf.line(10, pdf.get_y(), 200, pdf.get_y())
-    pdf.cell(0, 4, '', ln=True)
-    pdf.set_font('Helvetica', '', 9)
-    pdf.cell(0, 7, f'Report generated by: Enhanced ADB Forensic Monitor (Automated)', ln=True)
-    pdf.cell(0, 7, f'Timestamp: {now.strftime("%Y-%m-%d %H:%M:%S UTC")}', ln=True)
-    pdf.cell(0, 7, f'System: Forensic Analysis Workstation', ln=True)
-    pdf.cell(0, 7, f'Integrity: This report is auto-generated and has not been manually altered.', ln=True)
-    pdf.cell(0, 12, '', ln=True)
-    pdf.cell(0, 7, 'Examiner Signature: ________________________    Date: ____________', ln=True)
-    pdf.cell(0, 7, 'Reviewer Signature: ________________________    Date: ____________', ln=True)
-
-    # Output
-    buffer = io.BytesIO()
-    pdf.output(buffer)
-    buffer.seek(0)
-
-    return send_file(buffer, as_attachment=True,
-                    download_name=f'forensic_report_{now.strftime("%Y%m%d_%H%M%S")}.pdf',
-                    mimetype='application/pdf')
+    """
+    Generate a Legal-Ready Digital Forensic Report in PDF format.
+    Runs as a report job; this request just waits for it without blocking
+    other greenlets. Accepts the same scope arguments as /api/reports.
+    After REPORT_WAIT_SECONDS it gives up waiting and answers 504 with the
+    job, which keeps running and can be fetched via /api/reports/<id>.
+    """
+    try:
+        job = start_report()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    deadline = time.monotonic() + REPORT_WAIT_SECONDS
+    while not job.finished:
+        if time.monotonic() >= deadline:
+            return jsonify(job.to_dict()), 504
+        socketio.sleep(0.2)
+    if job.status != 'done':
+        return jsonify({'error': f'Report generation failed: {job.error}'}), 500
+    return send_file(job.path, as_attachment=True, download_name=job.download_name,
+                     mimetype='application/pdf')
 
 # ===== WebSocket Events =====
 @socketio.on('connect')
@@ -441,156 +661,267 @@ def background_stats_emitter():
                 print(f"[STATS] Error: {e}")
             socketio.sleep(5)
 
+def emit_new_logs(payloads):
+    """Count and broadcast a committed ingest batch."""
+    if payloads:
+        stats_counters.record(logs=len(payloads),
+                              alerts=sum(1 for p in payloads if p['is_anomaly']))
+    for payload in payloads:
+        threat_tracker.record(payload['device_id'], payload['severity'] == 'CRITICAL')
+        socketio.emit('new_log', payload)
+
+# Entries taken from a logcat queue at a time, and the per-device time
+# slice per tick; a device with more queued is drained again right away
+LOGCAT_DRAIN_BATCH = 500
+LOGCAT_DRAIN_SECONDS = 0.5
+
+def flush_ingest_on_exit():
+    """Write the entries still buffered in the ingestor on shutdown."""
+    with app.app_context():
+        log_ingestor.flush()
+
+atexit.register(flush_ingest_on_exit)
+
 def background_log_stream():
-    """Stream REAL logcat data from connected devices."""
-    global last_seen_raw
+    """Drain the per-device logcat streams and persist new entries."""
     with app.app_context():
         while True:
             online_devices = AndroidDevice.query.filter_by(status='online').all()
+            serials = {d.serial for d in online_devices}
+            logcat_streams.sync(serials)
+            # A returning device gets a new stream that replays nothing
+            for serial in [s for s in dedup_windows if s not in serials]:
+                del dedup_windows[serial]
             if not online_devices:
                 socketio.emit('no_device', {'message': 'No devices connected.'})
                 socketio.sleep(3)
                 continue
 
+            backlog = False
             for device in online_devices:
                 try:
-                    entries = adb_monitor.get_logcat(device.serial, lines=10)
-                    for entry in entries:
-                        raw_hash = hash(entry['raw'])
-                        if raw_hash in last_seen_raw:
-                            continue
-                        last_seen_raw.add(raw_hash)
-                        if len(last_seen_raw) > 5000:
-                            last_seen_raw = set(list(last_seen_raw)[-2000:])
-
-                        now = datetime.utcnow()
-                        is_anomaly = entry['severity'] == 'CRITICAL'
-                        log = ActivityLog(
-                            device_id=device.id, timestamp=now,
-                            app_name=entry['app_name'], event_type=entry['event_type'],
-                            severity=entry['severity'], raw_data=entry['raw'],
-                            is_anomaly=is_anomaly,
-                        )
-                        db.session.add(log)
-
-                        if is_anomaly:
-                            db.session.flush()
-                            db.session.add(Alert(
-                                log_id=log.id, alert_type='Unauthorized Activity',
-                                description=f"Critical: {entry['event_type']} from {entry['app_name']}",
-                                severity='CRITICAL',
-                            ))
-                        db.session.commit()
-
-                        socketio.emit('new_log', {
-                            'id': log.id, 'timestamp': now.isoformat() + 'Z',
-                            'app_name': entry['app_name'], 'event_type': entry['event_type'],
-                            'severity': entry['severity'], 'is_anomaly': is_anomaly,
-                            'source': 'adb_logcat',
-                        })
+                    window = dedup_windows.setdefault(device.serial, DedupWindow())
+                    # Drain until the queue is empty or the device's time slice is used up
+                    deadline = time.monotonic() + LOGCAT_DRAIN_SECONDS
+                    while True:
+                        entries = logcat_streams.drain(device.serial, LOGCAT_DRAIN_BATCH)
+                        for entry in entries:
+                            if window.is_duplicate(entry):
+                                continue
+                            if adb_monitor.is_package_event(entry['tag'], entry['message']):
+                                package_inventory.mark_dirty(device.serial)
+                            log_ingestor.add(device.id, entry)
+                        emit_new_logs(log_ingestor.flush_if_due())
+                        if len(entries) < LOGCAT_DRAIN_BATCH:
+                            break
+                        if time.monotonic() >= deadline:
+                            backlog = True
+                            break
+                        socketio.sleep(0)
                 except Exception as e:
                     print(f"[LOGCAT] Error: {e}")
 
-            socketio.sleep(2)
+            try:
+                emit_new_logs(log_ingestor.flush_if_due())
+            except Exception as e:
+                print(f"[LOGCAT] Error: {e}")
+
+            # Come straight back while a queue still holds a backlog
+            socketio.sleep(0 if backlog else 1)
+
+# Foreground changes arrive as logcat activity events; dumpsys only reconciles
+FOREGROUND_EVENT_POLL_SECONDS = 0.5
+FOREGROUND_RECONCILE_SECONDS = float(os.environ.get('FOREGROUND_RECONCILE_SECONDS', '30'))
+# Poll interval for devices whose logcat stream is down
+FOREGROUND_POLL_SECONDS = 5
+FOREGROUND_DEVICE_REFRESH_SECONDS = 5
+
+def handle_foreground(device, fg, now=None):
+    """Record a foreground sample, push it to the dashboard and analyze changes."""
+    # Extend the open session, or start a new one
+    foreground_sessions.observe(device['id'], fg, now)
+
+    # Emit to frontend
+    socketio.emit('foreground_update', {
+        'device_id': device['id'],
+        'package': fg['package'],
+        'label': fg['label'],
+        'category': fg['category'],
+    })
+
+    # Run behavior analysis when the foreground state changed
+    if not behavior_engine:
+        return
+    anomalies = behavior_engine.analyze_foreground_change(device['id'], fg)
+    for anom in anomalies:
+        # Save anomaly alert
+        alert = Alert(
+            alert_type=anom['type'],
+            description=anom['description'],
+            severity=anom['severity'],
+        )
+        db.session.add(alert)
+        db.session.commit()
+        stats_counters.record(alerts=1)
+
+        # Push to frontend
+        socketio.emit('anomaly_detected', {
+            'id': alert.id,
+            'type': anom['type'],
+            'severity': anom['severity'],
+            'description': anom['description'],
+            'package': anom.get('package', ''),
+            'category': anom.get('category', ''),
+            'timestamp': datetime.utcnow().strftime('%H:%M:%S'),
+        })
+
+        # Send email for critical anomalies
+        if anom['severity'] in ('HIGH', 'CRITICAL'):
+            send_alert_email(
+                anom['type'], anom['description'],
+                anom['severity'],
+                {'model': device['model'], 'serial': device['serial']}
+            )
 
 def background_foreground_tracker():
-    """Track foreground apps every 5 seconds and analyze via behavior engine."""
+    """
+    Follow foreground apps via the logcat activity events (checked every
+    0.5 s) and analyze changes via behavior engine. dumpsys runs every 30 s
+    to reconcile missed transitions, or every 5 s for devices without a
+    live logcat stream. It runs on the foreground poller's workers and its
+    results are picked up on later ticks, so a slow device never holds up
+    the event drain.
+    """
     with app.app_context():
+        devices = {}       # serial -> {'id', 'serial', 'model'}
+        last_polled = {}   # serial -> monotonic time of the last dumpsys
+        last_event = {}    # serial -> monotonic time of the last activity event
+        devices_at = 0.0
         while True:
-            online_devices = AndroidDevice.query.filter_by(status='online').all()
-            for device in online_devices:
+            now = time.monotonic()
+            if now - devices_at >= FOREGROUND_DEVICE_REFRESH_SECONDS:
                 try:
-                    fg = adb_monitor.get_foreground_app(device.serial)
-                    if fg:
-                        # Save snapshot
-                        snap = ForegroundSnapshot(
-                            device_id=device.id,
-                            package_name=fg['package'],
-                            app_label=fg['label'],
-                            category=fg['category'],
-                            timestamp=datetime.utcnow(),
-                        )
-                        db.session.add(snap)
-                        db.session.commit()
-
-                        # Emit to frontend
-                        socketio.emit('foreground_update', {
-                            'device_id': device.id,
-                            'package': fg['package'],
-                            'label': fg['label'],
-                            'category': fg['category'],
-                        })
-
-                        # Run behavior analysis
-                        if behavior_engine:
-                            anomalies = behavior_engine.analyze_foreground(device.id, fg)
-                            for anom in anomalies:
-                                # Save anomaly alert
-                                alert = Alert(
-                                    alert_type=anom['type'],
-                                    description=anom['description'],
-                                    severity=anom['severity'],
-                                )
-                                db.session.add(alert)
-                                db.session.commit()
-
-                                # Push to frontend
-                                socketio.emit('anomaly_detected', {
-                                    'id': alert.id,
-                                    'type': anom['type'],
-                                    'severity': anom['severity'],
-                                    'description': anom['description'],
-                                    'package': anom.get('package', ''),
-                                    'category': anom.get('category', ''),
-                                    'timestamp': datetime.utcnow().strftime('%H:%M:%S'),
-                                })
-
-                                # Send email for critical anomalies
-                                if anom['severity'] in ('HIGH', 'CRITICAL'):
-                                    send_alert_email(
-                                        anom['type'], anom['description'],
-                                        anom['severity'],
-                                        {'model': device.model, 'serial': device.serial}
-                                    )
+                    devices = {d.serial: {'id': d.id, 'serial': d.serial, 'model': d.model}
+                               for d in AndroidDevice.query.filter_by(status='online')}
+                    online_ids = {d['id'] for d in devices.values()}
+                    foreground_sessions.close_missing(online_ids)
+                    if behavior_engine:
+                        behavior_engine.retain_devices(online_ids)
+                    for known in (last_polled, last_event):
+                        for serial in [s for s in known if s not in devices]:
+                            del known[serial]
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"[FOREGROUND] Error: {e}")
+                devices_at = now
+
+            # Activity events from the logcat streams
+            for serial, device in devices.items():
+                try:
+                    for event_time, package, activity in logcat_streams.drain_foreground(serial):
+                        last_event[serial] = time.monotonic()
+                        handle_foreground(device, adb_monitor.describe_foreground(serial, package, activity),
+                                          event_time)
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"[FOREGROUND] Error: {e}")
 
+            # Periodic dumpsys reconciliation, started now and handled when done
+            for serial, fg in foreground_poller.completed().items():
+                # An activity event since the dumpsys started is newer than its answer
+                if (not fg or serial not in devices
+                        or last_event.get(serial, float('-inf')) >= last_polled.get(serial, 0.0)):
+                    continue
+                try:
+                    handle_foreground(devices[serial], fg)
                 except Exception as e:
+                    db.session.rollback()
                     print(f"[FOREGROUND] Error: {e}")
 
-            socketio.sleep(5)
+            due = [serial for serial in devices
+                   if now - last_polled.get(serial, float('-inf')) >= (
+                       FOREGROUND_RECONCILE_SECONDS if logcat_streams.is_alive(serial)
+                       else FOREGROUND_POLL_SECONDS)]
+            for serial in foreground_poller.submit(due, adb_monitor.get_foreground_app):
+                last_polled[serial] = now
+
+            socketio.sleep(FOREGROUND_EVENT_POLL_SECONDS)
+
+def flush_foreground_sessions():
+    """Persist the open sessions' end times on shutdown."""
+    with app.app_context():
+        try:
+            foreground_sessions.flush()
+        except Exception as e:
+            print(f"[FOREGROUND] Flush on exit failed: {e}")
+
+atexit.register(flush_foreground_sessions)
+
+def background_archiver():
+    """Move aged activity logs into the Parquet archive every hour."""
+    with app.app_context():
+        while True:
+            try:
+                log_archiver.archive()
+            except Exception as e:
+                db.session.rollback()
+                print(f"[ARCHIVE] Error: {e}")
+            socketio.sleep(ARCHIVE_INTERVAL_SECONDS)
+
+def collect_threat_inputs(serial):
+    """
+    Fetch the package listing (only when the inventory is due for a
+    rescan) and the running processes for a spyware scan. Returns
+    (listed_at, listing or None, processes); the inventory itself is
+    updated by the caller once the changes have been scanned.
+    """
+    listed_at, listing = time.monotonic(), None
+    if package_inventory.needs_rescan(serial):
+        listing = adb_monitor.list_installed_packages(serial)
+    return listed_at, listing, adb_monitor.get_running_processes(serial)
 
 def background_behavior_analyzer():
     """Run spyware scan and baseline updates every 30 seconds."""
     with app.app_context():
         while True:
             online_devices = AndroidDevice.query.filter_by(status='online').all()
+            package_inventory.retain({d.serial for d in online_devices})
+            results = behavior_poller.collect(
+                [d.serial for d in online_devices], collect_threat_inputs)
             for device in online_devices:
                 try:
                     # Update baseline from recent logs
                     if behavior_engine:
                         behavior_engine.update_baseline(device.id)
 
-                    # Scan installed packages for spyware
-                    packages = adb_monitor.get_installed_packages(device.serial)
-                    processes = adb_monitor.get_running_processes(device.serial)
+                    if device.serial not in results:
+                        continue
+                    listed_at, listing, processes = results[device.serial]
+                    packages = []
+                    if listing is not None:
+                        diff = package_inventory.diff(device.serial, listing)
+                        packages = diff['added'] + diff['updated']
+                        if packages or diff['removed']:
+                            print(f"[BEHAVIOR] {device.serial} packages: +{len(diff['added'])} "
+                                  f"~{len(diff['updated'])} -{len(diff['removed'])}")
 
                     if behavior_engine:
                         threats = behavior_engine.scan_for_threats(packages, processes)
                         for threat in threats:
-                            # Check if already reported recently
-                            existing = Alert.query.filter_by(
-                                description=threat['description'],
-                                resolved=False,
-                            ).first()
-                            if existing:
+                            # Already reported and still open?
+                            fingerprint = alert_fingerprint(device.id, threat['type'], threat.get('package'))
+                            if fingerprint in open_alerts:
                                 continue
 
-                            alert = Alert(
+                            alert = open_alerts.create(
+                                fingerprint,
                                 alert_type=threat['type'],
                                 description=threat['description'],
                                 severity=threat['severity'],
                             )
-                            db.session.add(alert)
-                            db.session.commit()
+                            if alert is None:
+                                continue
+                            stats_counters.record(alerts=1)
 
                             socketio.emit('anomaly_detected', {
                                 'id': alert.id,
@@ -609,7 +940,13 @@ def background_behavior_analyzer():
                                     {'model': device.model, 'serial': device.serial}
                                 )
 
+                    # Only now is the diff consumed; if anything above failed
+                    # the device stays due and the same changes are rescanned
+                    if listing is not None:
+                        package_inventory.update(device.serial, listing, listed_at)
+
                 except Exception as e:
+                    db.session.rollback()
                     print(f"[BEHAVIOR] Error: {e}")
 
             socketio.sleep(30)
@@ -618,6 +955,7 @@ def background_behavior_analyzer():
 if __name__ == '__main__':
     with app.app_context():
         db.create_all()
+        m.upgrade_schema()
         behavior_engine = BehaviorEngine(db, m)
     if os.environ.get('RENDER'):
         socketio.start_background_task(background_mock_stream)
@@ -629,6 +967,10 @@ if __name__ == '__main__':
         socketio.start_background_task(background_stats_emitter)
         socketio.start_background_task(background_foreground_tracker)
         socketio.start_background_task(background_behavior_analyzer)
-    
+    if archive_available():
+        socketio.start_background_task(background_archiver)
+    else:
+        print('[ARCHIVE] pyarrow not installed, log archival disabled')
+
     print('[SERVER] Enhanced ADB Forensic Monitor running')
     socketio.run(app, debug=False, port=5000, host='0.0.0.0')
@@ -0,0 +1,157 @@
+"""
+Layer 5: Activity Log Archive
+Moves ActivityLog rows older than ARCHIVE_AFTER_DAYS out of the hot table
+into zstd-compressed Parquet files, partitioned per day and per device:
+
+    <archive_dir>/date=YYYY-MM-DD/device_id=<id>/part-<run>.parquet
+
+Rows still referenced by an Alert stay in the hot table so alert links
+keep working. Files are written before the rows are deleted, so a crash
+in between can leave a row in both places but never in neither.
+Requires pyarrow; without it archiving is disabled.
+"""
+import os
+from datetime import datetime, timedelta
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+
+
+ARCHIVE_DIR = os.environ.get('ARCHIVE_DIR', '')
+ARCHIVE_AFTER_DAYS = float(os.environ.get('ARCHIVE_AFTER_DAYS', '30'))
+ARCHIVE_INTERVAL_SECONDS = float(os.environ.get('ARCHIVE_INTERVAL_SECONDS', '3600'))
+ARCHIVE_BATCH_ROWS = 50000
+
+# Baselines look back 72h; never archive rows they may still need to count
+MIN_ARCHIVE_AGE_HOURS = 72
+
+COLUMNS = ['id', 'device_id', 'timestamp', 'app_name', 'event_type',
+           'severity', 'is_anomaly', 'raw_data']
+
+
+def is_available():
+    return pa is not None
+
+
+def _schema():
+    return pa.schema([
+        ('id', pa.int64()), ('device_id', pa.int32()), ('timestamp', pa.timestamp('us')),
+        ('app_name', pa.string()), ('event_type', pa.string()), ('severity', pa.string()),
+        ('is_anomaly', pa.bool_()), ('raw_data', pa.string()),
+    ])
+
+
+class LogArchiver:
+    """Moves aged ActivityLog rows into Parquet partitions and reads them back."""
+
+    def __init__(self, db, ActivityLog, Alert, archive_dir, max_age_days=ARCHIVE_AFTER_DAYS):
+        self.db = db
+        self.ActivityLog = ActivityLog
+        self.Alert = Alert
+        self.archive_dir = archive_dir
+        self.max_age = max(timedelta(days=max_age_days), timedelta(hours=MIN_ARCHIVE_AGE_HOURS))
+        self._row_counts = {}  # parquet path -> num_rows, filled lazily
+
+    # ----- Writing -----
+    def archive(self, now=None):
+        """Archive every eligible row older than the retention age. Returns rows moved."""
+        if not is_available():
+            return 0
+        Log = self.ActivityLog
+        session = self.db.session
+        cutoff = (now or datetime.utcnow()) - self.max_age
+        run_id = datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')
+        referenced = self.db.select(self.Alert.log_id).where(self.Alert.log_id.isnot(None))
+        eligible = (Log.timestamp < cutoff, Log.id.notin_(referenced))
+
+        moved = 0
+        while True:
+            rows = session.query(*[getattr(Log, c) for c in COLUMNS]).filter(*eligible) \
+                .order_by(Log.id).limit(ARCHIVE_BATCH_ROWS).all()
+            if not rows:
+                break
+
+            partitions = {}
+            for row in rows:
+                partitions.setdefault((row.timestamp.date(), row.device_id), []).append(row)
+            for (day, device_id), part in partitions.items():
+                self._write_partition(day, device_id, part, f'{run_id}-{moved}')
+
+            # Every eligible row up to the batch's last id was just written out
+            Log.query.filter(Log.id <= rows[-1].id, *eligible).delete(synchronize_session=False)
+            session.commit()
+            moved += len(rows)
+
+        if moved:
+            print(f"[ARCHIVE] Moved {moved} activity logs older than {cutoff:%Y-%m-%d %H:%M} to {self.archive_dir}")
+        return moved
+
+    def _write_partition(self, day, device_id, rows, part_id):
+        directory = os.path.join(self.archive_dir, f'date={day.isoformat()}', f'device_id={device_id}')
+        os.makedirs(directory, exist_ok=True)
+        table = pa.Table.from_pylist([dict(zip(COLUMNS, row)) for row in rows], schema=_schema())
+        path = os.path.join(directory, f'part-{part_id}.parquet')
+        pq.write_table(table, path + '.tmp', compression='zstd')
+        os.replace(path + '.tmp', path)
+
+    # ----- Reading -----
+    def _partition_files(self, device_id=None, since=None, until=None):
+        """Parquet files in date order, pruned by device and day."""
+        if not os.path.isdir(self.archive_dir):
+            return
+        for date_dir in sorted(os.listdir(self.archive_dir)):
+            if not date_dir.startswith('date='):
+                continue
+            day = datetime.strptime(date_dir[5:], '%Y-%m-%d')
+            if (since and day + timedelta(days=1) <= since) or (until and day >= until):
+                continue
+            date_path = os.path.join(self.archive_dir, date_dir)
+            for device_dir in sorted(os.listdir(date_path)):
+                if device_id is not None and device_dir != f'device_id={device_id}':
+                    continue
+                device_path = os.path.join(date_path, device_dir)
+                for name in sorted(os.listdir(device_path)):
+                    if name.endswith('.parquet'):
+                        yield os.path.join(device_path, name)
+
+    def iter_rows(self, device_id=None, since=None, until=None, severities=None,
+                  app_name=None, batch_size=ARCHIVE_BATCH_ROWS // 10):
+        """
+        Yield archived rows as tuples in COLUMNS order, day by day.
+        Files are read batch by batch, so memory stays bounded.
+        """
+        if not is_available():
+            return
+        for path in self._partition_files(device_id, since, until):
+            for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size, columns=COLUMNS):
+                conds = []
+                if since:
+                    conds.append(pc.greater_equal(batch.column('timestamp'), pa.scalar(since, pa.timestamp('us'))))
+                if until:
+                    conds.append(pc.less(batch.column('timestamp'), pa.scalar(until, pa.timestamp('us'))))
+                if severities:
+                    conds.append(pc.is_in(batch.column('severity'), value_set=pa.array(severities)))
+                if app_name:
+                    conds.append(pc.equal(batch.column('app_name'), app_name))
+                if conds:
+                    mask = conds[0]
+                    for cond in conds[1:]:
+                        mask = pc.and_(mask, cond)
+                    batch = batch.filter(mask)
+                columns = [batch.column(c).to_pylist() for c in COLUMNS]
+                yield from zip(*columns)
+
+    def archived_row_count(self):
+        """Total archived rows, from Parquet footers (each file read once)."""
+        if not is_available():
+            return 0
+        total = 0
+        for path in self._partition_files():
+            if path not in self._row_counts:
+                self._row_counts[path] = pq.ParquetFile(path).metadata.num_rows
+            total += self._row_counts[path]
+        return total
@@ -17,62 +17,109 @@ SEVERITY_WARN = 'MEDIUM'
 SEVERITY_HIGH = 'HIGH'
 SEVERITY_CRITICAL = 'CRITICAL'
 
+# Width of one baseline bucket
+BUCKET_SPAN = timedelta(hours=1)
+
 
 class BaselineProfiler:
     """Learns what 'normal' looks like for a device."""
 
-    def __init__(self, db, Baseline, ActivityLog):
+    def __init__(self, db, Baseline, ActivityLog, BaselineBucket, BaselineWatermark):
         self.db = db
         self.Baseline = Baseline
         self.ActivityLog = ActivityLog
+        self.BaselineBucket = BaselineBucket
+        self.BaselineWatermark = BaselineWatermark
 
     def learn_from_logs(self, device_id, lookback_hours=72):
-        """Analyze recent logs to build/update baseline for a device."""
-        cutoff = datetime.utcnow() - timedelta(hours=lookback_hours)
-        logs = self.ActivityLog.query.filter(
-            self.ActivityLog.device_id == device_id,
-            self.ActivityLog.timestamp >= cutoff,
-        ).all()
-
-        if not logs:
-            return
-
-        # Count app usage
+        """
+        Fold logs newer than the device's watermark into hourly per-app
+        buckets, drop buckets that ended before the lookback, and rebuild
+        the baseline from what is left. Returns True if baselines were written.
+        """
+        session = self.db.session
+        Log, Bucket = self.ActivityLog, self.BaselineBucket
+        now = datetime.utcnow()
+        cutoff = now - timedelta(hours=lookback_hours)
+
+        watermark = session.get(self.BaselineWatermark, device_id)
+        if watermark is None:
+            watermark = self.BaselineWatermark(device_id=device_id, last_log_id=0)
+            session.add(watermark)
+
+        # Fix the upper bound first so rows committed mid-scan wait for next cycle
+        upper = session.query(self.db.func.max(Log.id)).filter(
+            Log.device_id == device_id,
+        ).scalar() or 0
+
+        day = self.db.func.date(Log.timestamp)
+        hour = self.db.extract('hour', Log.timestamp)
+        new_counts = session.query(
+            Log.app_name, day, hour, self.db.func.count(Log.id),
+        ).filter(
+            Log.device_id == device_id,
+            Log.id > (watermark.last_log_id or 0),
+            Log.id <= upper,
+            Log.timestamp >= cutoff,
+        ).group_by(Log.app_name, day, hour).all()
+
+        # The bucket holding the cutoff still covers part of the window
+        pruned = Bucket.query.filter(
+            Bucket.device_id == device_id, Bucket.bucket_start <= cutoff - BUCKET_SPAN,
+        ).delete(synchronize_session=False)
+
+        if not new_counts and not pruned:
+            watermark.last_log_id = max(watermark.last_log_id or 0, upper)
+            session.commit()
+            return False
+
+        # Merge the new counts into the live buckets
+        buckets = {(b.app_name, b.bucket_start): b for b in Bucket.query.filter_by(device_id=device_id)}
+        for app_name, bucket_day, bucket_hour, count in new_counts:
+            app_name = app_name or 'unknown'
+            start = datetime.strptime(str(bucket_day), '%Y-%m-%d') + timedelta(hours=int(bucket_hour))
+            bucket = buckets.get((app_name, start))
+            if bucket is None:
+                bucket = Bucket(device_id=device_id, app_name=app_name, bucket_start=start, count=0)
+                session.add(bucket)
+                buckets[(app_name, start)] = bucket
+            bucket.count += count
+
+        # Summarise buckets per app
         app_counts = {}
-        for log in logs:
-            app = log.app_name or 'unknown'
-            if app not in app_counts:
-                app_counts[app] = {'count': 0, 'hours': set()}
-            app_counts[app]['count'] += 1
-            app_counts[app]['hours'].add(log.timestamp.hour)
-
-        # Update or create baseline entries
-        for app_name, stats in app_counts.items():
-            existing = self.Baseline.query.filter_by(
-                device_id=device_id, app_name=app_name
-            ).first()
+        for (app_name, start), bucket in buckets.items():
+            stats = app_counts.setdefault(app_name, {'count': 0, 'hours': set()})
+            stats['count'] += bucket.count
+            stats['hours'].add(start.hour)
 
+        # Update or create baseline entries in one pass
+        existing = {b.app_name: b for b in self.Baseline.query.filter_by(device_id=device_id)}
+        for app_name, stats in app_counts.items():
             hours = sorted(stats['hours'])
             start_h = hours[0] if hours else DEFAULT_WORK_START
             end_h = hours[-1] if hours else DEFAULT_WORK_END
 
-            if existing:
-                existing.times_seen = stats['count']
-                existing.typical_start_hour = min(existing.typical_start_hour, start_h)
-                existing.typical_end_hour = max(existing.typical_end_hour, end_h)
-                existing.last_seen = datetime.utcnow()
+            entry = existing.get(app_name)
+            if entry:
+                entry.times_seen = stats['count']
+                entry.typical_start_hour = min(entry.typical_start_hour, start_h)
+                entry.typical_end_hour = max(entry.typical_end_hour, end_h)
+                entry.last_seen = now
             else:
-                self.db.session.add(self.Baseline(
+                session.add(self.Baseline(
                     device_id=device_id,
                     app_name=app_name,
                     typical_start_hour=start_h,
                     typical_end_hour=end_h,
                     is_whitelisted=True,  # Auto-whitelist newly seen apps
                     times_seen=stats['count'],
-                    last_seen=datetime.utcnow(),
+                    last_seen=now,
                 ))
 
-        self.db.session.commit()
+        watermark.last_log_id = max(watermark.last_log_id or 0, upper)
+        watermark.updated_at = now
+        session.commit()
+        return True
 
     def get_baseline(self, device_id):
         """Get current baseline for a device."""
@@ -91,6 +138,35 @@ class RealtimeComparator:
     def __init__(self, db, Baseline):
         self.db = db
         self.Baseline = Baseline
+        # device_id -> {app_name: (is_whitelisted, start_hour, end_hour)}
+        self._cache = {}
+
+    def _baselines(self, device_id):
+        """Baseline rules for a device, loaded from the DB on first use."""
+        rules = self._cache.get(device_id)
+        if rules is None:
+            rules = {}
+            for b in self.Baseline.query.filter_by(device_id=device_id).order_by(self.Baseline.id):
+                rules.setdefault(b.app_name, (b.is_whitelisted, b.typical_start_hour, b.typical_end_hour))
+            self._cache[device_id] = rules
+        return rules
+
+    def invalidate(self, device_id=None):
+        """Drop cached baselines for one device, or for all devices."""
+        if device_id is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(device_id, None)
+
+    def foreground_state(self, device_id, fg_info, current_hour):
+        """
+        Everything check_foreground_app's verdict depends on. Two samples
+        with the same state produce the same anomalies.
+        """
+        package = fg_info.get('package', '')
+        rule = self._baselines(device_id).get(package)
+        in_hours = rule is not None and rule[1] <= current_hour <= rule[2]
+        return package, fg_info.get('category', 'normal'), rule, in_hours
 
     def check_foreground_app(self, device_id, fg_info, current_hour=None):
         """
@@ -109,9 +185,7 @@ class RealtimeComparator:
         label = fg_info.get('label', package)
 
         # Check if this app exists in the baseline
-        baseline_entry = self.Baseline.query.filter_by(
-            device_id=device_id, app_name=package
-        ).first()
+        baseline_entry = self._baselines(device_id).get(package)
 
         # --- Check 1: Never-before-seen app ---
         if not baseline_entry:
@@ -124,7 +198,7 @@ class RealtimeComparator:
             })
 
         # --- Check 2: App used outside allowed hours ---
-        if baseline_entry and not baseline_entry.is_whitelisted:
+        if baseline_entry and not baseline_entry[0]:
             anomalies.append({
                 'type': 'Blacklisted Application',
                 'severity': SEVERITY_CRITICAL,
@@ -133,8 +207,7 @@ class RealtimeComparator:
                 'category': category,
             })
         elif baseline_entry:
-            start = baseline_entry.typical_start_hour
-            end = baseline_entry.typical_end_hour
+            _, start, end = baseline_entry
             if not (start <= current_hour <= end):
                 anomalies.append({
                     'type': 'Off-Hours Activity',
@@ -200,13 +273,28 @@ class BehaviorEngine:
     """Unified interface for the behavior analysis layer."""
 
     def __init__(self, db, models):
-        self.profiler = BaselineProfiler(db, models.Baseline, models.ActivityLog)
+        self.profiler = BaselineProfiler(db, models.Baseline, models.ActivityLog,
+                                         models.BaselineBucket, models.BaselineWatermark)
         self.comparator = RealtimeComparator(db, models.Baseline)
         self.detector = AnomalyDetector()
+        # device_id -> foreground state of the last analyzed sample
+        self._foreground_state = {}
 
-    def analyze_foreground(self, device_id, fg_info):
-        """Analyze current foreground app against baseline."""
-        return self.comparator.check_foreground_app(device_id, fg_info)
+    def analyze_foreground_change(self, device_id, fg_info, current_hour=None):
+        """
+        Analyze a foreground sample only if it differs from the last one
+        analyzed for the device: another package, a rule's hour boundary
+        crossed, or the app's baseline rule changed. Otherwise returns [].
+        """
+        if not fg_info:
+            return []
+        if current_hour is None:
+            current_hour = datetime.utcnow().hour
+        state = self.comparator.foreground_state(device_id, fg_info, current_hour)
+        if self._foreground_state.get(device_id) == state:
+            return []
+        self._foreground_state[device_id] = state
+        return self.comparator.check_foreground_app(device_id, fg_info, current_hour)
 
     def scan_for_threats(self, packages, processes):
         """Run spyware and suspicious process scans."""
@@ -217,7 +305,21 @@ class BehaviorEngine:
 
     def update_baseline(self, device_id):
         """Refresh baseline from recent logs."""
-        self.profiler.learn_from_logs(device_id)
+        if self.profiler.learn_from_logs(device_id):
+            self.comparator.invalidate(device_id)
+
+    def invalidate_baseline(self, device_id=None):
+        """Forget cached baselines and foreground state after baselines were edited elsewhere."""
+        self.comparator.invalidate(device_id)
+        if device_id is None:
+            self._foreground_state.clear()
+        else:
+            self._foreground_state.pop(device_id, None)
+
+    def retain_devices(self, device_ids):
+        """Forget the foreground state of devices not in device_ids (they went offline)."""
+        for device_id in [d for d in self._foreground_state if d not in device_ids]:
+            del self._foreground_state[device_id]
 
     def get_baseline(self, device_id):
         """Get current baseline for a device."""
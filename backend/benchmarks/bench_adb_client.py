@@ -0,0 +1,69 @@
+"""
+AdbClient against the fake adb server: per-command latency with and
+without warm transport sockets, plus the failure paths (server dropped
+every pooled socket, unknown serial).
+
+Each fake reply sleeps `latency_ms` to model the adb server's transport
+round trip, so a command on a fresh socket costs two more of them than
+one on a pooled socket.
+
+    python benchmarks/bench_adb_client.py [commands] [latency_ms]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from adb_client import AdbClient, AdbError  # noqa: E402
+from fake_adb_server import FakeAdbServer  # noqa: E402
+
+SERIAL = 'FAKE0001'
+
+
+def timed_shells(client, commands, pause=0.02):
+    """Mean seconds per shell call; the pause lets the refill thread catch up."""
+    total = 0.0
+    for i in range(commands):
+        started = time.perf_counter()
+        out = client.shell(SERIAL, f'echo {i}')
+        total += time.perf_counter() - started
+        assert out == f'out:echo {i}\n', out
+        time.sleep(pause)
+    return total / commands
+
+
+def main():
+    commands = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 5) / 1000
+    print(f"{commands} shell commands, {latency * 1000:.0f} ms per adb server reply")
+
+    for name, pool_size in (('fresh', 0), ('pooled', 2)):
+        server = FakeAdbServer(latency=latency).start()
+        client = AdbClient(port=server.port, pool_size=pool_size)
+        mean = timed_shells(client, commands)
+        print(f"{name:<7} {mean * 1000:>7.2f} ms/command   connections {server.connections}")
+        client.close()
+        server.shutdown()
+        server.server_close()
+
+    server = FakeAdbServer(latency=latency).start()
+    client = AdbClient(port=server.port)
+    timed_shells(client, 3)
+    server.drop_connections()
+    time.sleep(0.05)
+    out = client.shell(SERIAL, 'after restart')
+    print(f"stale pool  -> {out.strip()!r} (retried on a fresh socket)")
+    try:
+        client.shell('MISSING', 'id')
+    except AdbError as e:
+        print(f"unknown serial -> AdbError: {e}")
+    print(f"devices-l   -> {client.devices_l().splitlines()[1:]}")
+    client.close()
+    server.shutdown()
+    server.server_close()
+
+
+if __name__ == '__main__':
+    main()
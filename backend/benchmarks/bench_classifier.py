@@ -0,0 +1,116 @@
+"""
+Micro-benchmark: logcat parse + classify throughput (lines/sec).
+Compares the original chained any() classifier with the compiled one and
+checks both return the same event types.
+
+    python benchmarks/bench_classifier.py [lines]
+"""
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from adb_monitor import adb_monitor  # noqa: E402
+
+
+def legacy_classify(tag, message):
+    """The pre-compiled classifier, kept verbatim for comparison."""
+    msg_lower = message.lower()
+    tag_lower = tag.lower()
+
+    if any(k in msg_lower for k in ['permission', 'grant', 'deny', 'revoke']):
+        return 'Permission Update'
+    if any(k in msg_lower for k in ['network', 'socket', 'connect', 'http', 'dns']):
+        return 'Network Request'
+    if any(k in msg_lower for k in ['file', 'open', 'read', 'write', 'storage']):
+        return 'File Access'
+    if any(k in msg_lower for k in ['camera']):
+        return 'Camera Access'
+    if any(k in msg_lower for k in ['microphone', 'audio', 'record']):
+        return 'Microphone Access'
+    if any(k in msg_lower for k in ['location', 'gps', 'geofence']):
+        return 'Location Query'
+    if any(k in msg_lower for k in ['sms', 'message', 'telephony']):
+        return 'SMS Access'
+    if any(k in msg_lower for k in ['auth', 'login', 'password', 'credential']):
+        return 'Auth Attempt'
+    if any(k in msg_lower for k in ['crash', 'exception', 'fatal', 'anr']):
+        return 'Crash/ANR'
+    if any(k in msg_lower for k in ['process', 'fork', 'exec', 'kill']):
+        return 'Process Event'
+    if any(k in tag_lower for k in ['activity', 'activitymanager']):
+        return 'Activity Lifecycle'
+    if any(k in tag_lower for k in ['packagemanager', 'install']):
+        return 'Package Event'
+    return 'System Event'
+
+
+def legacy_parse(line):
+    match = re.match(r'^([VDIWEF])/(\S+)\s*\(\s*\d+\):\s*(.+)$', line)
+    if not match:
+        return None
+    level = match.group(1)
+    tag = match.group(2)
+    message = match.group(3).strip()
+    severity_map = {
+        'V': 'LOW', 'D': 'LOW', 'I': 'LOW',
+        'W': 'MEDIUM', 'E': 'CRITICAL', 'F': 'CRITICAL',
+    }
+    return {
+        'app_name': adb_monitor._friendly_name(tag),
+        'event_type': legacy_classify(tag, message),
+        'severity': severity_map.get(level, 'LOW'),
+        'raw': line,
+    }
+
+
+SAMPLE_LINES = [
+    "D/Choreographer( 1423): Skipped 31 frames!  The application may be doing too much work on its main thread.",
+    "I/ActivityTaskManager( 1187): START u0 {act=android.intent.action.MAIN cmp=com.whatsapp/.Main} from uid 10123",
+    "W/WifiHAL( 902): Failed to get link layer stats, ret=-95",
+    "E/AndroidRuntime( 4321): FATAL EXCEPTION: main Process: com.example, PID: 4321",
+    "I/PackageManager( 1187): Package com.example.app codePath changed",
+    "D/ConnectivityService( 1187): NetworkAgentInfo [WIFI () - 101] validation passed",
+    "V/AudioFlinger( 700): start output thread, session 1881",
+    "I/thermal_core( 611): skin temp 38C within limits",
+    "W/System.err( 5512): java.io.FileNotFoundException: /data/user/0/x/cache/a.tmp",
+    "I/GnssLocationProvider( 1187): reportLocation lat=12.9 lon=77.5",
+    "D/SDHMS:LOAD( 2331): cpu load 23%% gpu load 11%%",
+    "I/chatty( 1187): uid=1000 system_server identical 4 lines",
+    "E/readeny( 12): readeny overlap check",
+]
+
+
+def run(fn, lines):
+    start = time.perf_counter()
+    for line in lines:
+        fn(line)
+    return len(lines) / (time.perf_counter() - start)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    rng = random.Random(7)
+    lines = [rng.choice(SAMPLE_LINES) for _ in range(count)]
+
+    for line in SAMPLE_LINES:
+        parsed = adb_monitor._parse_logcat_line(line)
+        assert {k: parsed[k] for k in legacy_parse(line)} == legacy_parse(line), line
+
+    msgs = [line.split(':', 1)[1] for line in lines]
+    tags = [line.split('/', 1)[1].split('(', 1)[0] for line in lines]
+
+    before = run(lambda i: legacy_classify(tags[i], msgs[i]), range(count))
+    after = run(lambda i: adb_monitor._classify_event(tags[i], msgs[i]), range(count))
+    print(f"classify      legacy {before:>10,.0f} lines/s   compiled {after:>10,.0f} lines/s   x{after / before:.2f}")
+
+    before = run(legacy_parse, lines)
+    after = run(adb_monitor._parse_logcat_line, lines)
+    print(f"full parse    legacy {before:>10,.0f} lines/s   compiled {after:>10,.0f} lines/s   x{after / before:.2f}")
+
+
+if __name__ == '__main__':
+    main()
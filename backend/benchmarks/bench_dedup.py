@@ -0,0 +1,101 @@
+"""
+Dedup accuracy and throughput: legacy global hash set vs per-device DedupWindow.
+
+Replays a synthetic multi-device logcat stream in which some lines repeat
+legitimately (same tag and message, new timestamp) and some segments are
+re-delivered after a stream restart. Reports the false-drop rate (real
+lines suppressed) and false-pass rate (re-delivered lines kept).
+
+    python benchmarks/bench_dedup.py [lines]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dedup import DedupWindow  # noqa: E402
+
+MESSAGES = [
+    ('Choreographer', 'D', 'Skipped 31 frames!'),
+    ('WifiHAL', 'W', 'Failed to get link layer stats, ret=-95'),
+    ('thermal_core', 'I', 'skin temp 38C within limits'),
+    ('ConnectivityService', 'D', 'validation passed'),
+    ('BatteryStats', 'I', 'battery level 81'),
+]
+
+
+def make_stream(count, devices=4, replay_every=2000, replay_len=200, seed=11):
+    """Yield (serial, entry, is_redelivery) with ground truth attached."""
+    rng = random.Random(seed)
+    history = {f'dev{d}': [] for d in range(devices)}
+    clock = 0.0
+    produced = 0
+    while produced < count:
+        serial = f'dev{rng.randrange(devices)}'
+        clock += rng.random() / 50
+        tag, level, msg = rng.choice(MESSAGES)
+        secs = int(clock)
+        ts = f'10-16 12:{secs // 60 % 60:02d}:{secs % 60:02d}.{int(clock * 1000) % 1000:03d}'
+        pid = str(1000 + rng.randrange(3))
+        tid = str(int(pid) + rng.randrange(3))
+        entry = {
+            'logcat_time': ts, 'pid': pid, 'tid': tid, 'tag': tag, 'message': msg,
+            'raw': f'{ts} {pid:>5} {tid:>5} {level} {tag}: {msg}',
+            'brief': f'{level}/{tag}({pid:>5}): {msg}',
+        }
+        history[serial].append(entry)
+        produced += 1
+        yield serial, entry, False
+        if produced % replay_every == 0:
+            # A stream restart re-delivers the tail of one device's output
+            for old in history[serial][-replay_len:]:
+                yield serial, old, True
+
+
+def legacy(stream):
+    """The original global set keyed on hash(raw) of brief-format lines."""
+    seen = set()
+    for serial, entry, redelivered in stream:
+        key = hash(entry['brief'])
+        if key in seen:
+            yield redelivered, True
+            continue
+        seen.add(key)
+        if len(seen) > 5000:
+            seen = set(list(seen)[-2000:])
+        yield redelivered, False
+
+
+def windowed(stream):
+    windows = {}
+    for serial, entry, redelivered in stream:
+        window = windows.setdefault(serial, DedupWindow(clock=lambda: 0.0))
+        yield redelivered, window.is_duplicate(entry)
+
+
+def measure(name, results):
+    real = real_dropped = redelivered = redelivered_kept = 0
+    start = time.perf_counter()
+    for is_redelivery, dropped in results:
+        if is_redelivery:
+            redelivered += 1
+            redelivered_kept += not dropped
+        else:
+            real += 1
+            real_dropped += dropped
+    elapsed = time.perf_counter() - start
+    print(f"{name:<10} false-drop {real_dropped / real:7.2%}   "
+          f"false-pass {redelivered_kept / max(redelivered, 1):7.2%}   "
+          f"{(real + redelivered) / elapsed:>10,.0f} lines/s")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    measure('legacy', legacy(make_stream(count)))
+    measure('window', windowed(make_stream(count)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Alert email delivery against a local SMTP stand-in: inline sending (one
+connection and handshake per alert, as send_alert_email used to do) vs
+the queued EmailNotifier.
+
+The stand-in speaks just enough SMTP for smtplib and sleeps on connect
+to model the TCP/TLS/AUTH cost of a real provider. It reports how long
+the caller (the polling loop) is blocked, how many emails and
+connections the server saw, and how many alerts were delivered.
+
+    python benchmarks/bench_email_queue.py [alerts] [handshake_ms]
+"""
+import os
+import smtplib
+import socketserver
+import sys
+import threading
+import time
+from email.mime.text import MIMEText
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from email_notifier import EmailNotifier  # noqa: E402
+
+
+class StandInSMTP(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, handshake):
+        super().__init__(('127.0.0.1', 0), SMTPHandler)
+        self.handshake = handshake
+        self.connections = 0
+        self.messages = []
+        self.lock = threading.Lock()
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(line.encode() + b'\r\n')
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        time.sleep(server.handshake)
+        self.reply('220 stand-in ESMTP')
+        for raw in self.rfile:
+            verb = raw.decode(errors='replace').strip().split(' ', 1)[0].upper()
+            if verb in ('EHLO', 'HELO'):
+                self.reply('250 stand-in')
+            elif verb == 'DATA':
+                self.reply('354 end with .')
+                body = []
+                for line in self.rfile:
+                    if line in (b'.\r\n', b'.\n'):
+                        break
+                    body.append(line)
+                with server.lock:
+                    server.messages.append(b''.join(body))
+                self.reply('250 queued')
+            elif verb == 'QUIT':
+                self.reply('221 bye')
+                return
+            else:  # MAIL, RCPT, RSET, NOOP
+                self.reply('250 ok')
+
+
+def inline(server, alerts):
+    """One connection per alert, the old send path."""
+    blocked = 0.0
+    for i in range(alerts):
+        started = time.perf_counter()
+        msg = MIMEText(f'alert {i}', 'html')
+        msg['Subject'] = f'[CRITICAL] alert {i}'
+        with smtplib.SMTP(*server.server_address) as smtp:
+            smtp.ehlo()
+            smtp.sendmail('monitor@localhost', ['ops@localhost'], msg.as_string())
+        blocked += time.perf_counter() - started
+    return blocked
+
+
+def queued(server, alerts):
+    host, port = server.server_address
+    notifier = EmailNotifier(host=host, port=port, user='', password='', recipient='ops@localhost',
+                             sender='monitor@localhost', starttls=False,
+                             rate_limit=0.5, digest_window=0.2)
+    blocked = 0.0
+    for i in range(alerts):
+        started = time.perf_counter()
+        notifier.enqueue('Spyware Detected', f'alert {i}', 'CRITICAL', {'model': 'Bench', 'serial': 'B1'})
+        blocked += time.perf_counter() - started
+        time.sleep(0.01)  # alerts trickle in over the polling cycle
+    notifier.stop()
+    return blocked, notifier.sent_alerts
+
+
+def main():
+    alerts = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    handshake = (float(sys.argv[2]) if len(sys.argv) > 2 else 300) / 1000
+    print(f"{alerts} alerts, {handshake * 1000:.0f} ms connect/handshake")
+    for name in ('inline', 'queued'):
+        server = StandInSMTP(handshake)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        if name == 'inline':
+            blocked, delivered = inline(server, alerts), alerts
+        else:
+            blocked, delivered = queued(server, alerts)
+        server.shutdown()
+        server.server_close()
+        print(f"{name:<7} caller blocked {blocked:>7.3f}s   emails {len(server.messages):>3}   "
+              f"connections {server.connections:>3}   alerts delivered {delivered}")
+
+
+if __name__ == '__main__':
+    main()
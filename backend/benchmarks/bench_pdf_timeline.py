@@ -0,0 +1,117 @@
+"""
+PDF timeline rendering: the old approach (ORM objects loaded with .all(),
+five bordered pdf.cell calls per row) vs render_timeline fed column
+tuples from a yield_per cursor.
+
+Reports wall time, peak Python heap (tracemalloc) and output size for
+timelines of 10k and 100k events read from a temporary SQLite database.
+
+    python benchmarks/bench_pdf_timeline.py [rows ...]
+"""
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask  # noqa: E402
+from fpdf import FPDF  # noqa: E402
+
+from models import db, AndroidDevice, ActivityLog  # noqa: E402
+from reports import render_timeline, TIMELINE_COLUMNS  # noqa: E402
+
+APPS = ['System UI', 'WhatsApp', 'Chrome', 'Banking App', 'Settings', 'Telegram', 'Instagram']
+EVENTS = ['Network Request', 'File Access', 'Permission Update', 'Process Event', 'Camera Access']
+
+
+def seed(n):
+    device = AndroidDevice(serial='BENCH-001', model='Bench', status='online')
+    db.session.add(device)
+    db.session.commit()
+    start = datetime.utcnow()
+    table = ActivityLog.__table__
+    for offset in range(0, n, 10000):
+        db.session.execute(table.insert(), [{
+            'device_id': device.id, 'timestamp': start - timedelta(seconds=i),
+            'app_name': APPS[i % len(APPS)], 'event_type': EVENTS[i % len(EVENTS)],
+            'severity': 'CRITICAL' if i % 7 == 0 else 'LOW', 'raw_data': f'bench line {i}',
+            'is_anomaly': i % 7 == 0,
+        } for i in range(offset, min(offset + 10000, n))])
+    db.session.commit()
+
+
+def new_pdf():
+    pdf = FPDF()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.add_page()
+    return pdf
+
+
+def legacy(n):
+    logs = ActivityLog.query.order_by(ActivityLog.timestamp.desc()).limit(n).all()
+    pdf = new_pdf()
+    pdf.set_font('Helvetica', '', 7)
+    for log in logs:
+        if log.is_anomaly:
+            pdf.set_fill_color(255, 245, 245)
+        fill = bool(log.is_anomaly)
+        pdf.cell(30, 6, log.timestamp.strftime('%H:%M:%S'), 1, 0, 'C', fill=fill)
+        pdf.cell(55, 6, (log.app_name or '-')[:28], 1, 0, '', fill=fill)
+        pdf.cell(55, 6, (log.event_type or '-')[:28], 1, 0, '', fill=fill)
+        pdf.cell(25, 6, (log.severity or '-'), 1, 0, 'C', fill=fill)
+        pdf.cell(20, 6, 'YES' if log.is_anomaly else '', 1, 1, 'C', fill=fill)
+    return pdf
+
+
+def streaming(n):
+    rows = db.session.query(*[getattr(ActivityLog, c) for c in TIMELINE_COLUMNS]) \
+        .order_by(ActivityLog.timestamp.desc(), ActivityLog.id.desc()).limit(n).yield_per(2000)
+    pdf = new_pdf()
+    render_timeline(pdf, rows, n)
+    return pdf
+
+
+def measure(fn, n):
+    db.session.expunge_all()
+    started = time.perf_counter()
+    out = io.BytesIO()
+    fn(n).output(out)
+    elapsed = time.perf_counter() - started
+
+    db.session.expunge_all()
+    tracemalloc.start()
+    fn(n).output(io.BytesIO())
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak, len(out.getvalue())
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [10000, 100000]
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+    db.init_app(app)
+    try:
+        with app.app_context():
+            db.create_all()
+            seed(max(sizes))
+            print(f"{'rows':>8} {'variant':<10} {'seconds':>8} {'rows/s':>9} {'peak MiB':>9} {'PDF KiB':>9}")
+            for n in sizes:
+                for name, fn in (('legacy', legacy), ('streaming', streaming)):
+                    elapsed, peak, size = measure(fn, n)
+                    print(f"{n:>8} {name:<10} {elapsed:>8.2f} {n / elapsed:>9,.0f} "
+                          f"{peak / 2**20:>9.1f} {size / 1024:>9,.0f}")
+    finally:
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+
+if __name__ == '__main__':
+    main()
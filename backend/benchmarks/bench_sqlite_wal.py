@@ -0,0 +1,117 @@
+"""
+SQLite ingest throughput under concurrent API reads: default pragmas vs
+the tuned SQLITE_PRAGMAS (WAL, synchronous=NORMAL, busy timeout, mmap,
+cache) applied by models.py.
+
+One writer commits batches of activity_logs rows, the way the ingest
+flush does, while reader threads run the /api/logs page and stats-style
+queries.
+
+    python benchmarks/bench_sqlite_wal.py [seconds] [readers]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import SQLITE_PRAGMAS, apply_sqlite_pragmas  # noqa: E402
+
+SCHEMA = """
+CREATE TABLE activity_logs (
+    id INTEGER PRIMARY KEY, device_id INTEGER NOT NULL, timestamp DATETIME,
+    app_name VARCHAR(200), event_type VARCHAR(100), severity VARCHAR(20),
+    raw_data TEXT, is_anomaly BOOLEAN
+);
+CREATE INDEX ix_activity_logs_device_timestamp ON activity_logs (device_id, timestamp);
+"""
+BATCH = 100
+READS = [
+    "SELECT * FROM activity_logs WHERE device_id = 1 ORDER BY timestamp DESC, id DESC LIMIT 100",
+    "SELECT count(*) FROM activity_logs WHERE severity = 'CRITICAL'",
+]
+
+
+def connect(path, pragmas):
+    conn = sqlite3.connect(path, timeout=5 if pragmas is None else 0, check_same_thread=False)
+    if pragmas:
+        apply_sqlite_pragmas(conn, pragmas)
+    return conn
+
+
+def run(label, pragmas, seconds, readers):
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    setup = connect(path, pragmas)
+    setup.executescript(SCHEMA)
+    setup.close()
+
+    stop = threading.Event()
+    counts = {'rows': 0, 'reads': 0, 'errors': 0}
+    lock = threading.Lock()
+
+    def writer():
+        conn = connect(path, pragmas)
+        n = 0
+        while not stop.is_set():
+            now = datetime.utcnow().isoformat()
+            rows = [(1 + (n + i) % 4, now, 'App', 'System Event',
+                     'CRITICAL' if i % 7 == 0 else 'LOW', 'I/Tag( 1): message', i % 7 == 0)
+                    for i in range(BATCH)]
+            try:
+                conn.executemany("INSERT INTO activity_logs (device_id, timestamp, app_name, event_type, "
+                                 "severity, raw_data, is_anomaly) VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+                conn.commit()
+                n += BATCH
+            except sqlite3.OperationalError:
+                conn.rollback()
+                with lock:
+                    counts['errors'] += 1
+        conn.close()
+        with lock:
+            counts['rows'] += n
+
+    def reader(k):
+        conn = connect(path, pragmas)
+        n = 0
+        while not stop.is_set():
+            try:
+                conn.execute(READS[(n + k) % len(READS)]).fetchall()
+                n += 1
+            except sqlite3.OperationalError:
+                with lock:
+                    counts['errors'] += 1
+        conn.close()
+        with lock:
+            counts['reads'] += n
+
+    threads = [threading.Thread(target=writer)] + \
+              [threading.Thread(target=reader, args=(k,)) for k in range(readers)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+    print(f"{label:<8} ingest {counts['rows'] / seconds:>10,.0f} rows/s   "
+          f"reads {counts['reads'] / seconds:>8,.0f} q/s   lock errors {counts['errors']}")
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    readers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    print(f"{seconds:.0f}s per run, 1 writer ({BATCH} rows/commit), {readers} readers")
+    run('default', None, seconds, readers)
+    run('tuned', SQLITE_PRAGMAS, seconds, readers)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""
+Minimal fake adb server for exercising AdbClient without a device.
+
+Speaks the host protocol subset the client uses: host:version,
+host:devices-l, host:transport:<serial> followed by one shell:<command>,
+and FAIL for unknown serials and unsupported services. Shell commands
+are answered from a dict ({command: output}, default "out:<command>").
+`latency` sleeps before every reply to model a slow USB transport, and
+drop_connections() closes every open socket as if the server restarted.
+
+    python benchmarks/fake_adb_server.py [port]
+    ADB_SERVER_PORT=<port> python app.py
+"""
+import socketserver
+import sys
+import threading
+import time
+
+
+class FakeAdbServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, port=0, devices=None, responses=None, latency=0.0):
+        super().__init__(('127.0.0.1', port), FakeAdbHandler)
+        self.devices = devices or {'FAKE0001': 'Pixel_7'}  # serial -> model
+        self.responses = responses or {}
+        self.latency = latency
+        self.connections = 0
+        self.commands = []
+        self.lock = threading.Lock()
+        self._open = set()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def drop_connections(self):
+        """Close every open connection, pooled sockets included."""
+        with self.lock:
+            sockets, self._open = self._open, set()
+        for sock in sockets:
+            try:
+                sock.shutdown(2)
+            except OSError:
+                pass
+
+
+class FakeAdbHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+            server._open.add(self.request)
+        try:
+            self.serve()
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            with server.lock:
+                server._open.discard(self.request)
+
+    def recv_exact(self, n):
+        buf = b''
+        while len(buf) < n:
+            chunk = self.request.recv(n - len(buf))
+            if not chunk:
+                raise ConnectionError('client closed')
+            buf += chunk
+        return buf
+
+    def read_request(self):
+        length = int(self.recv_exact(4), 16)
+        return self.recv_exact(length).decode('utf-8')
+
+    def okay(self, body=None):
+        time.sleep(self.server.latency)
+        data = b'OKAY'
+        if body is not None:
+            payload = body.encode('utf-8')
+            data += b'%04x' % len(payload) + payload
+        self.request.sendall(data)
+
+    def fail(self, message):
+        time.sleep(self.server.latency)
+        payload = message.encode('utf-8')
+        self.request.sendall(b'FAIL' + b'%04x' % len(payload) + payload)
+
+    def serve(self):
+        server = self.server
+        request = self.read_request()
+        if request == 'host:version':
+            self.okay('%04x' % 41)
+        elif request == 'host:devices-l':
+            self.okay(''.join(f'{serial}\tdevice product:fake model:{model} device:fake\n'
+                              for serial, model in server.devices.items()))
+        elif request.startswith('host:transport:'):
+            serial = request[len('host:transport:'):]
+            if serial not in server.devices:
+                self.fail(f"device '{serial}' not found")
+                return
+            self.okay()
+            service = self.read_request()
+            if not service.startswith('shell:'):
+                self.fail(f'unsupported service {service}')
+                return
+            command = service[len('shell:'):]
+            with server.lock:
+                server.commands.append((serial, command))
+            self.okay()
+            output = server.responses.get(command, f'out:{command}\n')
+            self.request.sendall(output.replace('\n', '\r\n').encode('utf-8'))
+        else:
+            self.fail(f'unknown host service {request}')
+
+
+def main():
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 5037
+    server = FakeAdbServer(port)
+    print(f"fake adb server on 127.0.0.1:{server.port} with {list(server.devices)}")
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
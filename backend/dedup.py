@@ -0,0 +1,67 @@
+"""
+Per-device duplicate suppression for logcat entries.
+Keys are (logcat timestamp, pid, tid, tag, message) hashes kept in
+insertion order, so the oldest key is always the next one evicted.
+"""
+import os
+import time
+from collections import OrderedDict
+
+
+# Max keys remembered per device and how long a key is remembered
+DEDUP_WINDOW_SIZE = int(os.environ.get('DEDUP_WINDOW_SIZE', '20000'))
+DEDUP_WINDOW_SECONDS = float(os.environ.get('DEDUP_WINDOW_SECONDS', '300'))
+
+
+def entry_key(entry):
+    """Identity of a logcat line; brief lines carry no time, so use the raw text."""
+    if entry.get('logcat_time'):
+        return hash((entry['logcat_time'], entry['pid'], entry['tid'],
+                     entry['tag'], entry['message']))
+    return hash(entry['raw'])
+
+
+class DedupWindow:
+    """Bounded, time-ordered set of recently seen entry keys for one device."""
+
+    def __init__(self, max_entries=DEDUP_WINDOW_SIZE, max_age=DEDUP_WINDOW_SECONDS,
+                 clock=time.monotonic):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.clock = clock
+        self._seen = OrderedDict()  # key -> time first seen
+        self.checked = 0
+        self.duplicates = 0
+        self.evicted = 0
+
+    def is_duplicate(self, entry):
+        """Record the entry and report whether it was already in the window."""
+        now = self.clock()
+        self._expire(now)
+        self.checked += 1
+
+        key = entry_key(entry)
+        if key in self._seen:
+            self.duplicates += 1
+            return True
+
+        self._seen[key] = now
+        if len(self._seen) > self.max_entries:
+            self._seen.popitem(last=False)
+            self.evicted += 1
+        return False
+
+    def _expire(self, now):
+        seen = self._seen
+        while seen:
+            key, first_seen = next(iter(seen.items()))
+            if now - first_seen <= self.max_age:
+                break
+            seen.popitem(last=False)
+            self.evicted += 1
+
+    def stats(self):
+        return {
+            'size': len(self._seen), 'checked': self.checked,
+            'duplicates': self.duplicates, 'evicted': self.evicted,
+        }
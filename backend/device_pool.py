@@ -0,0 +1,104 @@
+"""
+Concurrent per-device collection for the background loops.
+ADB round trips run on a bounded worker pool with a per-cycle deadline,
+so one slow device no longer stalls the rest. Callers keep DB writes on
+their own task and only hand plain serials to the workers.
+The caller waits by polling the futures with the `sleep` it was given
+(socketio.sleep under eventlet), so other greenlets keep running. Loops
+that must not wait at all use submit() and pick up completed() results
+on a later tick.
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Max devices queried at once by one loop
+DEVICE_CONCURRENCY = int(os.environ.get('DEVICE_CONCURRENCY', '8'))
+
+# How long a loop waits for a device before skipping it this cycle
+DEVICE_DEADLINE_SECONDS = float(os.environ.get('DEVICE_DEADLINE_SECONDS', '20'))
+
+# How often a waiting loop checks its workers
+DEVICE_POLL_SECONDS = 0.05
+
+
+class DevicePoller:
+    """Runs one collection function per device on a shared worker pool."""
+
+    def __init__(self, name, max_workers=DEVICE_CONCURRENCY,
+                 deadline=DEVICE_DEADLINE_SECONDS, sleep=time.sleep):
+        self.name = name
+        self.deadline = deadline
+        self.sleep = sleep
+        self.executor = ThreadPoolExecutor(max_workers=max_workers,
+                                           thread_name_prefix=name)
+        self._inflight = {}  # serial -> future that missed an earlier deadline
+
+    def collect(self, serials, fn, deadline=None):
+        """
+        Call fn(serial) for every serial concurrently.
+        Returns {serial: result} for calls that finished before the deadline.
+        Devices whose previous call is still running are skipped rather
+        than piling up more work behind them.
+        """
+        futures = {}
+        for serial in serials:
+            stuck = self._inflight.get(serial)
+            if stuck is not None:
+                if not stuck.done():
+                    continue
+                del self._inflight[serial]
+            futures[self.executor.submit(fn, serial)] = serial
+
+        if not futures:
+            return {}
+
+        expires = time.monotonic() + (deadline or self.deadline)
+        not_done = set(futures)
+        while True:
+            not_done = {f for f in not_done if not f.done()}
+            if not not_done or time.monotonic() >= expires:
+                break
+            self.sleep(DEVICE_POLL_SECONDS)
+        done = [f for f in futures if f not in not_done]
+
+        results = {}
+        for future in done:
+            serial = futures[future]
+            try:
+                results[serial] = future.result()
+            except Exception as e:
+                print(f"[{self.name.upper()}] {serial} failed: {e}")
+        for future in not_done:
+            serial = futures[future]
+            self._inflight[serial] = future
+            print(f"[{self.name.upper()}] {serial} missed the deadline, skipping this cycle")
+        return results
+
+    def submit(self, serials, fn):
+        """
+        Start fn(serial) for every serial without a call in flight and
+        return at once. Returns the serials actually started.
+        """
+        started = []
+        for serial in serials:
+            running = self._inflight.get(serial)
+            if running is not None and not running.done():
+                continue
+            self._inflight[serial] = self.executor.submit(fn, serial)
+            started.append(serial)
+        return started
+
+    def completed(self):
+        """{serial: result} for the calls that finished since the last check."""
+        results = {}
+        for serial, future in list(self._inflight.items()):
+            if not future.done():
+                continue
+            del self._inflight[serial]
+            try:
+                results[serial] = future.result()
+            except Exception as e:
+                print(f"[{self.name.upper()}] {serial} failed: {e}")
+        return results
@@ -2,9 +2,16 @@
 Layer 4: Email Alert Notifier
 SMTP email sender for HIGH/CRITICAL forensic alerts.
 Configured via environment variables for security.
+
+Alerts are queued and sent by a background thread over one reused SMTP
+session. Alerts that arrive while the rate limit is in effect are merged
+into a single digest email, not dropped.
 """
+import atexit
 import os
+import queue
 import smtplib
+import threading
 import time
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
@@ -17,80 +24,60 @@ SMTP_PORT = int(os.environ.get('SMTP_PORT', '587'))
 SMTP_USER = os.environ.get('SMTP_USER', '')
 SMTP_PASS = os.environ.get('SMTP_PASS', '')
 ALERT_RECIPIENT = os.environ.get('ALERT_RECIPIENT', '')
+# Set SMTP_STARTTLS=0 for a plain local relay (or test SMTP server) without auth
+SMTP_STARTTLS = os.environ.get('SMTP_STARTTLS', '1').lower() not in ('0', 'false', 'no')
+SMTP_FROM = os.environ.get('SMTP_FROM', '') or SMTP_USER or 'adb-monitor@localhost'
 SENDER_NAME = 'ADB Forensic Monitor'
 
-# Rate limiting: max 1 email per 5 minutes
-_last_email_time = 0
-RATE_LIMIT_SECONDS = 300
+# Rate limiting: max 1 email per 5 minutes; alerts in between go into a digest
+RATE_LIMIT_SECONDS = float(os.environ.get('EMAIL_RATE_LIMIT_SECONDS', '300'))
+# After the first alert of a burst, wait this long for more before sending
+DIGEST_WINDOW_SECONDS = float(os.environ.get('EMAIL_DIGEST_WINDOW_SECONDS', '10'))
+# Close the SMTP session after this long without sending
+SMTP_IDLE_SECONDS = float(os.environ.get('SMTP_IDLE_SECONDS', '600'))
+# Alerts held for the next email before the oldest are dropped
+EMAIL_MAX_PENDING = int(os.environ.get('EMAIL_MAX_PENDING', '500'))
+# Alerts listed in a digest body; the rest are only counted
+DIGEST_MAX_ITEMS = 50
+
+SEVERITY_COLORS = {
+    'LOW': '#10b981',
+    'MEDIUM': '#f59e0b',
+    'HIGH': '#f97316',
+    'CRITICAL': '#ef4444',
+}
+SEVERITY_RANK = {'LOW': 0, 'MEDIUM': 1, 'HIGH': 2, 'CRITICAL': 3}
 
 
 def is_configured():
     """Check if SMTP is configured."""
-    return bool(SMTP_USER and SMTP_PASS and ALERT_RECIPIENT)
-
-
-def send_alert_email(alert_type, description, severity='HIGH', device_info=None):
-    """
-    Send an HTML-formatted alert email.
-    Returns True on success, False on failure.
-    """
-    global _last_email_time
-
-    if not is_configured():
-        print("[EMAIL] SMTP not configured — skipping email alert")
-        return False
-
-    # Rate limiting
-    now = time.time()
-    if now - _last_email_time < RATE_LIMIT_SECONDS:
-        print("[EMAIL] Rate limited — skipping email")
+    if not ALERT_RECIPIENT:
         return False
+    # Authenticated STARTTLS needs credentials; a plain relay does not
+    return bool(SMTP_USER and SMTP_PASS) or not SMTP_STARTTLS
 
-    try:
-        msg = MIMEMultipart('alternative')
-        msg['Subject'] = f'[{severity}] ADB Forensic Alert: {alert_type}'
-        msg['From'] = f'{SENDER_NAME} <{SMTP_USER}>'
-        msg['To'] = ALERT_RECIPIENT
-
-        # Build HTML email
-        severity_colors = {
-            'LOW': '#10b981',
-            'MEDIUM': '#f59e0b',
-            'HIGH': '#f97316',
-            'CRITICAL': '#ef4444',
-        }
-        color = severity_colors.get(severity, '#ef4444')
 
-        device_html = ''
-        if device_info:
-            device_html = f"""
+def _device_row(device_info):
+    if not device_info:
+        return ''
+    return f"""
             <tr>
                 <td style="padding:8px;color:#94a3b8;">Device</td>
                 <td style="padding:8px;font-family:monospace;">{device_info.get('model', 'Unknown')} ({device_info.get('serial', 'N/A')})</td>
             </tr>
             """
 
-        html = f"""
+
+def _page(color, heading, content):
+    return f"""
         <html>
         <body style="background:#070b0f;color:#e0e6ed;font-family:Inter,Arial,sans-serif;padding:24px;">
             <div style="max-width:600px;margin:0 auto;background:#10171e;border:1px solid rgba(0,242,255,0.1);border-radius:12px;overflow:hidden;">
                 <div style="background:{color};padding:16px 24px;">
-                    <h2 style="margin:0;color:white;font-size:1.1rem;">⚠ FORENSIC ALERT — {severity}</h2>
+                    <h2 style="margin:0;color:white;font-size:1.1rem;">{heading}</h2>
                 </div>
                 <div style="padding:24px;">
-                    <h3 style="color:#00f2ff;margin:0 0 12px 0;">{alert_type}</h3>
-                    <p style="color:#e0e6ed;line-height:1.6;">{description}</p>
-                    <table style="width:100%;border-collapse:collapse;margin-top:16px;">
-                        <tr>
-                            <td style="padding:8px;color:#94a3b8;">Timestamp</td>
-                            <td style="padding:8px;font-family:monospace;">{datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}</td>
-                        </tr>
-                        <tr>
-                            <td style="padding:8px;color:#94a3b8;">Severity</td>
-                            <td style="padding:8px;"><span style="background:{color};color:white;padding:2px 10px;border-radius:4px;font-size:0.8rem;font-weight:700;">{severity}</span></td>
-                        </tr>
-                        {device_html}
-                    </table>
+                    {content}
                 </div>
                 <div style="padding:16px 24px;border-top:1px solid rgba(255,255,255,0.05);font-size:0.75rem;color:#64748b;">
                     Enhanced ADB Forensic Monitor — Automated Alert System
@@ -100,19 +87,248 @@ def send_alert_email(alert_type, description, severity='HIGH', device_info=None)
         </html>
         """
 
+
+def render_alert(alert):
+    """Subject and HTML body for a single alert."""
+    color = SEVERITY_COLORS.get(alert['severity'], '#ef4444')
+    content = f"""
+                    <h3 style="color:#00f2ff;margin:0 0 12px 0;">{alert['alert_type']}</h3>
+                    <p style="color:#e0e6ed;line-height:1.6;">{alert['description']}</p>
+                    <table style="width:100%;border-collapse:collapse;margin-top:16px;">
+                        <tr>
+                            <td style="padding:8px;color:#94a3b8;">Timestamp</td>
+                            <td style="padding:8px;font-family:monospace;">{alert['time'].strftime('%Y-%m-%d %H:%M:%S UTC')}</td>
+                        </tr>
+                        <tr>
+                            <td style="padding:8px;color:#94a3b8;">Severity</td>
+                            <td style="padding:8px;"><span style="background:{color};color:white;padding:2px 10px;border-radius:4px;font-size:0.8rem;font-weight:700;">{alert['severity']}</span></td>
+                        </tr>
+                        {_device_row(alert['device_info'])}
+                    </table>
+    """
+    subject = f"[{alert['severity']}] ADB Forensic Alert: {alert['alert_type']}"
+    return subject, _page(color, f"⚠ FORENSIC ALERT — {alert['severity']}", content)
+
+
+def render_digest(alerts):
+    """Subject and HTML body for several alerts in one email."""
+    worst = max((a['severity'] for a in alerts), key=lambda s: SEVERITY_RANK.get(s, 3))
+    color = SEVERITY_COLORS.get(worst, '#ef4444')
+    rows = ''.join(f"""
+                        <tr>
+                            <td style="padding:6px;font-family:monospace;color:#94a3b8;">{a['time'].strftime('%H:%M:%S')}</td>
+                            <td style="padding:6px;"><span style="background:{SEVERITY_COLORS.get(a['severity'], '#ef4444')};color:white;padding:2px 6px;border-radius:4px;font-size:0.7rem;font-weight:700;">{a['severity']}</span></td>
+                            <td style="padding:6px;"><b style="color:#00f2ff;">{a['alert_type']}</b><br>{a['description']}</td>
+                            <td style="padding:6px;font-family:monospace;color:#94a3b8;">{(a['device_info'] or {}).get('serial', '')}</td>
+                        </tr>""" for a in alerts[:DIGEST_MAX_ITEMS])
+    more = len(alerts) - DIGEST_MAX_ITEMS
+    if more > 0:
+        rows += f"""
+                        <tr><td colspan="4" style="padding:6px;color:#94a3b8;">… and {more} more alerts</td></tr>"""
+    first, last = alerts[0]['time'], alerts[-1]['time']
+    content = f"""
+                    <p style="color:#e0e6ed;line-height:1.6;">{len(alerts)} alerts between {first.strftime('%H:%M:%S')} and {last.strftime('%H:%M:%S UTC')}</p>
+                    <table style="width:100%;border-collapse:collapse;margin-top:16px;">{rows}
+                    </table>
+    """
+    subject = f"[{worst}] ADB Forensic Alert Digest: {len(alerts)} alerts"
+    return subject, _page(color, f"⚠ FORENSIC ALERT DIGEST — {worst}", content)
+
+
+class EmailNotifier:
+    """
+    Queues alerts and sends them from a worker thread.
+    At most one email goes out per rate-limit interval: a lone alert is
+    sent as before, several are sent as one digest. The SMTP session is
+    kept open between emails and re-established if the server dropped it.
+    """
+
+    def __init__(self, host=SMTP_HOST, port=SMTP_PORT, user=SMTP_USER, password=SMTP_PASS,
+                 recipient=ALERT_RECIPIENT, sender=SMTP_FROM, starttls=SMTP_STARTTLS,
+                 rate_limit=RATE_LIMIT_SECONDS, digest_window=DIGEST_WINDOW_SECONDS,
+                 idle_timeout=SMTP_IDLE_SECONDS, max_pending=EMAIL_MAX_PENDING):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.recipient = recipient
+        self.sender = sender
+        self.starttls = starttls
+        self.rate_limit = rate_limit
+        self.digest_window = digest_window
+        self.idle_timeout = idle_timeout
+        self.max_pending = max_pending
+        self.queue = queue.Queue()
+        self.sent_emails = 0
+        self.sent_alerts = 0
+        self.failures = 0
+        self.dropped = 0
+        self.connects = 0
+        self._pending = []
+        self._server = None
+        self._last_used = 0.0
+        self._last_sent = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    # ----- Producer side -----
+    def enqueue(self, alert_type, description, severity='HIGH', device_info=None):
+        """Queue an alert for the worker. Never blocks on SMTP."""
+        self._ensure_worker()
+        self.queue.put({
+            'alert_type': alert_type, 'description': description,
+            'severity': severity, 'device_info': device_info,
+            'time': datetime.utcnow(),
+        })
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name='email-notifier', daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout=10):
+        """Send whatever is pending, then stop the worker and close the session."""
+        thread = self._thread
+        if thread and thread.is_alive():
+            self._stop.set()
+            self.queue.put(None)  # wake the worker
+            thread.join(timeout)
+
+    def stats(self):
+        return {
+            'queued': self.queue.qsize(), 'pending': len(self._pending),
+            'sentEmails': self.sent_emails, 'sentAlerts': self.sent_alerts,
+            'failures': self.failures, 'dropped': self.dropped,
+            'connects': self.connects, 'connected': self._server is not None,
+        }
+
+    # ----- Worker side -----
+    def _next_send_time(self):
+        """When the pending alerts may go out: after the burst window and the rate limit."""
+        due = self._pending[0]['_queued'] + self.digest_window
+        if self._last_sent is not None:
+            due = max(due, self._last_sent + self.rate_limit)
+        return due
+
+    def _take(self, timeout):
+        try:
+            alert = self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return
+        while alert is not None:
+            alert['_queued'] = time.monotonic()
+            self._pending.append(alert)
+            try:
+                alert = self.queue.get_nowait()
+            except queue.Empty:
+                break
+        overflow = len(self._pending) - self.max_pending
+        if overflow > 0:
+            del self._pending[:overflow]
+            self.dropped += overflow
+            print(f"[EMAIL] Pending queue full, dropped {overflow} oldest alerts")
+
+    def _run(self):
+        while True:
+            now = time.monotonic()
+            if self._pending:
+                wait = self._next_send_time() - now
+                if wait <= 0 or self._stop.is_set():
+                    self._flush()
+                    continue
+            else:
+                if self._stop.is_set():
+                    break
+                wait = self.idle_timeout
+                if self._server is not None:
+                    wait = max(0.0, self._last_used + self.idle_timeout - now)
+            self._take(wait)
+            if self._server is not None and not self._pending \
+                    and time.monotonic() - self._last_used >= self.idle_timeout:
+                self._disconnect()
+        self._disconnect()
+
+    def _flush(self):
+        batch = self._pending
+        subject, html = render_alert(batch[0]) if len(batch) == 1 else render_digest(batch)
+        msg = MIMEMultipart('alternative')
+        msg['Subject'] = subject
+        msg['From'] = f'{SENDER_NAME} <{self.sender}>'
+        msg['To'] = self.recipient
         msg.attach(MIMEText(html, 'html'))
 
-        with smtplib.SMTP(SMTP_HOST, SMTP_PORT) as server:
-            server.ehlo()
-            server.starttls()
+        if self._send(msg):
+            self._pending = []
+            self.sent_emails += 1
+            self.sent_alerts += len(batch)
+            print(f"[EMAIL] Alert sent: {subject}")
+        else:
+            # Keep the batch; the rate limit spaces out the retry
+            self.failures += 1
+            if self._stop.is_set():
+                self.dropped += len(batch)
+                self._pending = []
+        self._last_sent = time.monotonic()
+
+    def _send(self, msg):
+        """Send on the open session, reconnecting once if it went stale."""
+        for attempt in (1, 2):
+            try:
+                if self._server is None:
+                    self._connect()
+                self._server.sendmail(self.sender, [self.recipient], msg.as_string())
+                self._last_used = time.monotonic()
+                return True
+            except (smtplib.SMTPServerDisconnected, smtplib.SMTPResponseException, OSError) as e:
+                self._disconnect()
+                if attempt == 2:
+                    print(f"[EMAIL] Failed to send: {e}")
+                    return False
+            except Exception as e:
+                self._disconnect()
+                print(f"[EMAIL] Failed to send: {e}")
+                return False
+        return False
+
+    def _connect(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=30)
+        try:
             server.ehlo()
-            server.login(SMTP_USER, SMTP_PASS)
-            server.sendmail(SMTP_USER, [ALERT_RECIPIENT], msg.as_string())
+            if self.starttls:
+                server.starttls()
+                server.ehlo()
+            if self.user and self.password:
+                server.login(self.user, self.password)
+        except Exception:
+            server.close()
+            raise
+        self._server = server
+        self.connects += 1
 
-        _last_email_time = time.time()
-        print(f"[EMAIL] Alert sent: {alert_type} ({severity})")
-        return True
+    def _disconnect(self):
+        server, self._server = self._server, None
+        if server is not None:
+            try:
+                server.quit()
+            except Exception:
+                server.close()
 
-    except Exception as e:
-        print(f"[EMAIL] Failed to send: {e}")
+
+# Singleton
+notifier = EmailNotifier()
+atexit.register(notifier.stop)
+
+
+def send_alert_email(alert_type, description, severity='HIGH', device_info=None):
+    """
+    Queue an HTML-formatted alert email.
+    Returns True if the alert was queued, False if SMTP is not configured.
+    """
+    if not is_configured():
+        print("[EMAIL] SMTP not configured — skipping email alert")
         return False
+    notifier.enqueue(alert_type, description, severity, device_info)
+    return True
@@ -0,0 +1,125 @@
+"""
+Run-length encoded foreground history.
+ForegroundSessionRecorder turns the foreground samples into one
+ForegroundSession row per uninterrupted stretch of a package. The open
+session is extended in memory and written only when the package changes,
+the device goes away, every FOREGROUND_CHECKPOINT_SECONDS, and at exit.
+expand_sessions turns sessions back into the point samples that
+ForegroundSnapshot used to store.
+"""
+import os
+from datetime import datetime, timedelta
+
+
+# How often an open session's end time and sample count are persisted
+FOREGROUND_CHECKPOINT_SECONDS = float(os.environ.get('FOREGROUND_CHECKPOINT_SECONDS', '120'))
+
+
+class ForegroundSessionRecorder:
+    """Keeps each device's open session in memory and persists transitions."""
+
+    def __init__(self, db, ForegroundSession, checkpoint_every=FOREGROUND_CHECKPOINT_SECONDS):
+        self.db = db
+        self.ForegroundSession = ForegroundSession
+        self.checkpoint_every = timedelta(seconds=checkpoint_every)
+        # device_id -> {id, package, started, ended, samples, saved_at}
+        self._open = {}
+        self.samples = 0
+        self.writes = 0
+
+    def observe(self, device_id, fg, now=None):
+        """
+        Record one foreground sample. Returns True when it started a new
+        session (the foreground package changed), False if it extended
+        the open one.
+        """
+        now = now or datetime.utcnow()
+        self.samples += 1
+        session = self._open.get(device_id)
+        if session and session['package'] == fg['package']:
+            session['ended'] = now
+            session['samples'] += 1
+            if now - session['saved_at'] >= self.checkpoint_every:
+                self._save(session, now)
+                self.db.session.commit()
+            return False
+
+        if session:
+            self._save(session, now)
+        row = self.ForegroundSession(
+            device_id=device_id, package_name=fg['package'],
+            app_label=fg.get('label'), category=fg.get('category', 'normal'),
+            started_at=now, ended_at=now, sample_count=1,
+        )
+        self.db.session.add(row)
+        self.db.session.flush()
+        self.writes += 1
+        self._open[device_id] = {
+            'id': row.id, 'package': fg['package'],
+            'started': now, 'ended': now, 'samples': 1, 'saved_at': now,
+        }
+        self.db.session.commit()
+        return True
+
+    def close(self, device_id, now=None):
+        """Persist and forget a device's open session."""
+        session = self._open.pop(device_id, None)
+        if session:
+            self._save(session, now or datetime.utcnow())
+            self.db.session.commit()
+
+    def close_missing(self, device_ids):
+        """Close the sessions of devices that are no longer online."""
+        for device_id in [d for d in self._open if d not in device_ids]:
+            self.close(device_id)
+
+    def flush(self):
+        """Checkpoint every open session (e.g. before shutdown)."""
+        if not self._open:
+            return
+        now = datetime.utcnow()
+        for session in self._open.values():
+            self._save(session, now)
+        self.db.session.commit()
+
+    def _save(self, session, now):
+        self.db.session.query(self.ForegroundSession).filter_by(id=session['id']).update({
+            'ended_at': session['ended'], 'sample_count': session['samples'],
+        }, synchronize_session=False)
+        session['saved_at'] = now
+        self.writes += 1
+
+    def stats(self):
+        return {'openSessions': len(self._open), 'samples': self.samples, 'writes': self.writes}
+
+
+def expand_sessions(sessions, since=None, until=None):
+    """
+    Yield ForegroundSnapshot-shaped dicts for ForegroundSession rows:
+    sample_count points spread evenly from started_at to ended_at,
+    optionally limited to [since, until).
+    """
+    for s in sessions:
+        count = max(s.sample_count or 1, 1)
+        step = (s.ended_at - s.started_at) / (count - 1) if count > 1 else timedelta(0)
+        for i in range(count):
+            ts = s.started_at + step * i
+            if (since and ts < since) or (until and ts >= until):
+                continue
+            yield {
+                'device_id': s.device_id, 'timestamp': ts,
+                'package_name': s.package_name, 'app_label': s.app_label,
+                'category': s.category,
+            }
+
+
+def sessions_in_range(ForegroundSession, device_id=None, since=None, until=None):
+    """Query for sessions overlapping [since, until), oldest first."""
+    query = ForegroundSession.query
+    if device_id is not None:
+        query = query.filter(ForegroundSession.device_id == device_id)
+    if since:
+        query = query.filter(ForegroundSession.ended_at >= since)
+    if until:
+        query = query.filter(ForegroundSession.started_at < until)
+    return query.order_by(ForegroundSession.started_at, ForegroundSession.id)
@@ -0,0 +1,113 @@
+"""
+Layer 2c: Buffered Log Ingestion
+Collects ActivityLog/Alert rows from the logcat streams and writes them in
+one transaction per flush window instead of one commit per line.
+A batch whose commit fails is put back and retried on the next flush.
+"""
+import os
+import time
+from datetime import datetime
+
+
+# Flush when this many entries are pending...
+INGEST_BATCH_SIZE = int(os.environ.get('INGEST_BATCH_SIZE', '500'))
+# ...or when the oldest pending entry has waited this long
+INGEST_FLUSH_SECONDS = float(os.environ.get('INGEST_FLUSH_SECONDS', '1.0'))
+# Entries kept for retry after failed flushes before the oldest are dropped
+INGEST_MAX_PENDING = int(os.environ.get('INGEST_MAX_PENDING', '20000'))
+
+
+class LogIngestor:
+    """Buffers parsed logcat entries and bulk-inserts them."""
+
+    def __init__(self, db, ActivityLog, Alert,
+                 batch_size=INGEST_BATCH_SIZE, flush_seconds=INGEST_FLUSH_SECONDS,
+                 max_pending=INGEST_MAX_PENDING):
+        self.db = db
+        self.ActivityLog = ActivityLog
+        self.Alert = Alert
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.max_pending = max_pending
+        self._pending = []
+        self._oldest = None
+        self.written = 0
+        self.failed_flushes = 0
+        self.dropped = 0
+
+    def add(self, device_id, entry, source='adb_logcat'):
+        """Queue one parsed logcat entry for the next flush."""
+        if not self._pending:
+            self._oldest = time.monotonic()
+        self._pending.append((device_id, entry, source, datetime.utcnow()))
+
+    def due(self):
+        if not self._pending:
+            return False
+        return (len(self._pending) >= self.batch_size
+                or time.monotonic() - self._oldest >= self.flush_seconds)
+
+    def flush_if_due(self):
+        return self.flush() if self.due() else []
+
+    def flush(self):
+        """
+        Write all pending rows in a single transaction.
+        Returns the `new_log` socket payloads, only once the commit succeeded.
+        """
+        if not self._pending:
+            return []
+        pending, self._pending = self._pending, []
+
+        session = self.db.session
+        try:
+            logs = [self.ActivityLog(
+                device_id=device_id, timestamp=ts,
+                app_name=entry['app_name'], event_type=entry['event_type'],
+                severity=entry['severity'], raw_data=entry['raw'],
+                is_anomaly=entry['severity'] == 'CRITICAL',
+            ) for device_id, entry, _, ts in pending]
+            session.add_all(logs)
+            session.flush()  # one batched INSERT, assigns log ids for the alerts
+
+            session.add_all([self.Alert(
+                log_id=log.id, alert_type='Unauthorized Activity',
+                description=f"Critical: {log.event_type} from {log.app_name}",
+                severity='CRITICAL',
+            ) for log in logs if log.is_anomaly])
+
+            # Build payloads before commit expires the instances
+            payloads = [{
+                'id': log.id, 'device_id': log.device_id,
+                'timestamp': log.timestamp.isoformat() + 'Z',
+                'app_name': log.app_name, 'event_type': log.event_type,
+                'severity': log.severity, 'is_anomaly': log.is_anomaly,
+                'source': source,
+            } for log, (_, _, source, _) in zip(logs, pending)]
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            self._requeue(pending)
+            self.failed_flushes += 1
+            print(f"[INGEST] Flush of {len(pending)} entries failed, will retry: {e}")
+            return []
+        self.written += len(pending)
+        return payloads
+
+    def _requeue(self, batch):
+        """Put a failed batch back in front of newer entries, dropping the oldest past max_pending."""
+        pending = batch + self._pending
+        overflow = len(pending) - self.max_pending
+        if overflow > 0:
+            pending = pending[overflow:]
+            self.dropped += overflow
+            print(f"[INGEST] Dropped {overflow} entries after repeated flush failures")
+        self._pending = pending
+        # Retry after another flush window rather than on every tick
+        self._oldest = time.monotonic()
+
+    def stats(self):
+        return {
+            'pending': len(self._pending), 'written': self.written,
+            'failedFlushes': self.failed_flushes, 'dropped': self.dropped,
+        }
@@ -0,0 +1,138 @@
+"""
+Live dashboard statistics kept in memory so compute_stats never scans tables.
+- StatsCounters: log/alert/device totals bumped by the write paths and
+  periodically reconciled against real COUNT(*) queries
+- ThreatTracker: sliding windows of recent events, globally and per device,
+  giving the critical ratio and threat level in O(1)
+"""
+import os
+import threading
+import time
+from collections import deque
+
+
+# How often the in-memory counters are checked against the database
+STATS_RECONCILE_SECONDS = float(os.environ.get('STATS_RECONCILE_SECONDS', '300'))
+
+# Threat level looks at the last N events that are also within the last T seconds
+THREAT_WINDOW_EVENTS = int(os.environ.get('THREAT_WINDOW_EVENTS', '50'))
+THREAT_WINDOW_SECONDS = float(os.environ.get('THREAT_WINDOW_SECONDS', '600'))
+
+
+def threat_level(ratio):
+    """Map a critical-event ratio onto the dashboard threat levels."""
+    if ratio > 0.4:
+        return 'CRITICAL'
+    if ratio > 0.25:
+        return 'HIGH'
+    if ratio > 0.1:
+        return 'ELEVATED'
+    return 'LOW'
+
+
+class StatsCounters:
+    """Incrementally maintained totals for the stats broadcast."""
+
+    def __init__(self, reconcile_every=STATS_RECONCILE_SECONDS):
+        self.reconcile_every = reconcile_every
+        self.total_logs = 0
+        self.unresolved_alerts = 0
+        self.online_devices = 0
+        self._reconciled_at = None
+        self._lock = threading.Lock()
+
+    def record(self, logs=0, alerts=0):
+        """Account for committed ActivityLog and (unresolved) Alert rows."""
+        with self._lock:
+            self.total_logs += logs
+            self.unresolved_alerts += alerts
+
+    def set_online_devices(self, count):
+        with self._lock:
+            self.online_devices = count
+
+    def needs_reconcile(self):
+        return (self._reconciled_at is None
+                or time.monotonic() - self._reconciled_at >= self.reconcile_every)
+
+    def reconcile(self, total_logs, unresolved_alerts, online_devices):
+        """Replace the counters with authoritative values from the database."""
+        with self._lock:
+            drift = (total_logs - self.total_logs, unresolved_alerts - self.unresolved_alerts)
+            self.total_logs = total_logs
+            self.unresolved_alerts = unresolved_alerts
+            self.online_devices = online_devices
+            first = self._reconciled_at is None
+            self._reconciled_at = time.monotonic()
+        if not first and any(drift):
+            print(f"[STATS] Reconciled counters (drift logs={drift[0]}, alerts={drift[1]})")
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'total_logs': self.total_logs,
+                'unresolved_alerts': self.unresolved_alerts,
+                'online_devices': self.online_devices,
+            }
+
+
+class ThreatWindow:
+    """Ring buffer of (time, is_critical) with a running critical count."""
+
+    def __init__(self, max_events=THREAT_WINDOW_EVENTS, max_age=THREAT_WINDOW_SECONDS,
+                 clock=time.monotonic):
+        self.max_events = max_events
+        self.max_age = max_age
+        self.clock = clock
+        self._events = deque()
+        self._critical = 0
+
+    def add(self, is_critical):
+        now = self.clock()
+        self._events.append((now, is_critical))
+        self._critical += is_critical
+        if len(self._events) > self.max_events:
+            _, dropped = self._events.popleft()
+            self._critical -= dropped
+        self._expire(now)
+
+    def _expire(self, now):
+        events = self._events
+        while events and now - events[0][0] > self.max_age:
+            _, dropped = events.popleft()
+            self._critical -= dropped
+
+    def snapshot(self):
+        self._expire(self.clock())
+        total = len(self._events)
+        ratio = self._critical / total if total else 0.0
+        return {
+            'events': total, 'critical': self._critical,
+            'criticalRatio': round(ratio, 4), 'threatLevel': threat_level(ratio),
+        }
+
+
+class ThreatTracker:
+    """Global and per-device threat windows fed by the ingest path."""
+
+    def __init__(self, max_events=THREAT_WINDOW_EVENTS, max_age=THREAT_WINDOW_SECONDS):
+        self.max_events = max_events
+        self.max_age = max_age
+        self.overall = ThreatWindow(max_events, max_age)
+        self.devices = {}  # device_id -> ThreatWindow
+        self._lock = threading.Lock()
+
+    def record(self, device_id, is_critical):
+        with self._lock:
+            window = self.devices.get(device_id)
+            if window is None:
+                window = self.devices[device_id] = ThreatWindow(self.max_events, self.max_age)
+            window.add(is_critical)
+            self.overall.add(is_critical)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'global': self.overall.snapshot(),
+                'devices': {device_id: w.snapshot() for device_id, w in self.devices.items()},
+            }
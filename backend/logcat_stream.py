@@ -0,0 +1,203 @@
+"""
+Layer 2b: Streaming Logcat Reader
+- LogcatStream: one long-lived `adb logcat` process per device, read line by line
+- LogcatStreamManager: starts/stops streams as devices come and go
+Parsed entries land in a bounded queue that the log stream task drains.
+Activity start/display lines are also copied to a small foreground-event
+queue for the foreground tracker.
+"""
+import atexit
+import os
+import queue
+import subprocess
+import threading
+import time
+from datetime import datetime
+
+from adb_monitor import adb_monitor
+
+
+# Max parsed entries buffered per device before the oldest are dropped
+LOGCAT_QUEUE_SIZE = int(os.environ.get('LOGCAT_QUEUE_SIZE', '5000'))
+
+# Max foreground events buffered per device
+FOREGROUND_EVENT_QUEUE_SIZE = 100
+
+# Restart backoff for a logcat process that exits or fails to start
+RESTART_BACKOFF_MIN = 1.0
+RESTART_BACKOFF_MAX = 60.0
+
+
+class LogcatStream:
+    """Continuously reads one device's logcat on a background thread."""
+
+    def __init__(self, serial, monitor, maxsize=LOGCAT_QUEUE_SIZE):
+        self.serial = serial
+        self.monitor = monitor
+        self.queue = queue.Queue(maxsize=maxsize)
+        # (utc time, package, activity) for each activity brought to the front
+        self.foreground_events = queue.Queue(maxsize=FOREGROUND_EVENT_QUEUE_SIZE)
+        self.dropped = 0
+        self.restarts = 0
+        self.last_time = None  # logcat timestamp of the newest line read
+        self._proc = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._read_loop, name=f'logcat-{serial}', daemon=True,
+        )
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._kill()
+
+    @property
+    def alive(self):
+        return self._proc is not None and self._proc.poll() is None
+
+    def drain(self, max_items=500):
+        """Return up to max_items queued entries without blocking."""
+        return self._drain(self.queue, max_items)
+
+    def drain_foreground(self):
+        """Return the queued foreground events, oldest first."""
+        return self._drain(self.foreground_events, FOREGROUND_EVENT_QUEUE_SIZE)
+
+    @staticmethod
+    def _drain(q, max_items):
+        entries = []
+        while len(entries) < max_items:
+            try:
+                entries.append(q.get_nowait())
+            except queue.Empty:
+                break
+        return entries
+
+    def _spawn(self):
+        # First start: -T 1 begins at the newest line, so the old buffer is
+        # not replayed. Restarts resume from the last timestamp read; the
+        # lines replayed at that timestamp are dropped by the dedup window.
+        since = self.last_time or "1"
+        cmd = [self.monitor.adb, "-s", self.serial, "logcat", "-v", "threadtime", "-T", since]
+        return subprocess.Popen(
+            cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            text=True, errors='replace', bufsize=1,
+        )
+
+    def _kill(self):
+        proc = self._proc
+        if proc and proc.poll() is None:
+            try:
+                proc.terminate()
+                proc.wait(timeout=3)
+            except Exception:
+                proc.kill()
+
+    def _read_loop(self):
+        backoff = RESTART_BACKOFF_MIN
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                self._proc = self._spawn()
+                for line in self._proc.stdout:
+                    if self._stop.is_set():
+                        break
+                    parsed = self.monitor._parse_logcat_line(line.rstrip('\r\n'))
+                    if parsed:
+                        if parsed['logcat_time']:
+                            self.last_time = parsed['logcat_time']
+                        self._put(self.queue, parsed)
+                        activity = self.monitor.parse_foreground_event(parsed['tag'], parsed['message'])
+                        if activity:
+                            self._put(self.foreground_events, (datetime.utcnow(), *activity))
+            except FileNotFoundError:
+                print(f"[LOGCAT] adb binary not found for {self.serial}")
+            except Exception as e:
+                print(f"[LOGCAT] Stream error on {self.serial}: {e}")
+            finally:
+                self._kill()
+
+            if self._stop.is_set():
+                break
+
+            # A stream that stayed up for a while is healthy; start over
+            if time.monotonic() - started > RESTART_BACKOFF_MAX:
+                backoff = RESTART_BACKOFF_MIN
+            self.restarts += 1
+            print(f"[LOGCAT] Stream for {self.serial} ended, restarting in {backoff:.0f}s")
+            self._stop.wait(backoff)
+            backoff = min(backoff * 2, RESTART_BACKOFF_MAX)
+
+    def _put(self, q, entry):
+        """Enqueue an entry, dropping the oldest one when the queue is full."""
+        while True:
+            try:
+                q.put_nowait(entry)
+                return
+            except queue.Full:
+                try:
+                    q.get_nowait()
+                    if q is self.queue:
+                        self.dropped += 1
+                except queue.Empty:
+                    pass
+
+
+class LogcatStreamManager:
+    """Keeps exactly one LogcatStream running per online device."""
+
+    def __init__(self, monitor):
+        self.monitor = monitor
+        self.streams = {}
+        self.dropped = 0  # lines dropped by streams that have since stopped
+        self._lock = threading.Lock()
+
+    def sync(self, serials):
+        """Start streams for new serials and stop streams for missing ones."""
+        wanted = set(serials)
+        with self._lock:
+            for serial in list(self.streams):
+                if serial not in wanted:
+                    stream = self.streams.pop(serial)
+                    stream.stop()
+                    self.dropped += stream.dropped
+            for serial in wanted:
+                if serial not in self.streams:
+                    stream = LogcatStream(serial, self.monitor)
+                    self.streams[serial] = stream
+                    stream.start()
+
+    def drain(self, serial, max_items=500):
+        stream = self.streams.get(serial)
+        return stream.drain(max_items) if stream else []
+
+    def drain_foreground(self, serial):
+        stream = self.streams.get(serial)
+        return stream.drain_foreground() if stream else []
+
+    def is_alive(self, serial):
+        stream = self.streams.get(serial)
+        return bool(stream and stream.alive)
+
+    def stop_all(self):
+        with self._lock:
+            for stream in self.streams.values():
+                stream.stop()
+            self.streams.clear()
+
+    def dropped_total(self):
+        """Lines dropped on full queues since startup, across all streams."""
+        return self.dropped + sum(s.dropped for s in list(self.streams.values()))
+
+    def stats(self):
+        return {serial: {
+            'alive': s.alive, 'queued': s.queue.qsize(),
+            'dropped': s.dropped, 'restarts': s.restarts,
+        } for serial, s in list(self.streams.items())}
+
+
+# Singleton
+logcat_streams = LogcatStreamManager(adb_monitor)
+atexit.register(logcat_streams.stop_all)
@@ -1,8 +1,35 @@
+import os
+import sqlite3
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 from datetime import datetime
 
 db = SQLAlchemy()
 
+# Applied to every new SQLite connection. WAL lets the background writers
+# and API readers run side by side instead of blocking each other.
+SQLITE_PRAGMAS = {
+    'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+    'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+    'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', '5000')),
+    'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))),
+    'cache_size': -int(os.environ.get('SQLITE_CACHE_KB', '65536')),  # negative = KiB
+}
+
+
+def apply_sqlite_pragmas(connection, pragmas=SQLITE_PRAGMAS):
+    cursor = connection.cursor()
+    for name, value in pragmas.items():
+        cursor.execute(f'PRAGMA {name}={value}')
+    cursor.close()
+
+
+@event.listens_for(Engine, 'connect')
+def _configure_sqlite(dbapi_connection, connection_record):
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        apply_sqlite_pragmas(dbapi_connection)
+
 
 class User(db.Model):
     __tablename__ = 'users'
@@ -35,6 +62,10 @@ class ActivityLog(db.Model):
 
     device = db.relationship('AndroidDevice', backref=db.backref('logs', lazy=True))
 
+    __table_args__ = (
+        db.Index('ix_activity_logs_device_timestamp', 'device_id', 'timestamp'),
+    )
+
 
 class Alert(db.Model):
     __tablename__ = 'alerts'
@@ -45,9 +76,21 @@ class Alert(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     resolved = db.Column(db.Boolean, default=False)
     severity = db.Column(db.String(20), default='HIGH')
+    # sha1 of (device, type, package) for threat-scan alerts, see alert_index
+    fingerprint = db.Column(db.String(40), nullable=True)
 
     log = db.relationship('ActivityLog', backref=db.backref('alerts', lazy=True))
 
+    __table_args__ = (
+        db.Index('ix_alerts_resolved_severity_created', 'resolved', 'severity', 'created_at'),
+        # Keyset order for unfiltered, resolved-only and severity-only pages
+        db.Index('ix_alerts_created_id', 'created_at', 'id'),
+        db.Index('ix_alerts_resolved_created_id', 'resolved', 'created_at', 'id'),
+        # At most one open alert per fingerprint
+        db.Index('uq_alerts_open_fingerprint', 'fingerprint', unique=True,
+                 sqlite_where=db.text('NOT resolved'), postgresql_where=db.text('NOT resolved')),
+    )
+
 
 class Baseline(db.Model):
     """Stores learned normal usage patterns per device."""
@@ -65,6 +108,28 @@ class Baseline(db.Model):
     device = db.relationship('AndroidDevice', backref=db.backref('baselines', lazy=True))
 
 
+class BaselineBucket(db.Model):
+    """Per-app log counts for one clock hour, summed into Baseline."""
+    __tablename__ = 'baseline_buckets'
+    id = db.Column(db.Integer, primary_key=True)
+    device_id = db.Column(db.Integer, db.ForeignKey('android_devices.id'), nullable=False)
+    app_name = db.Column(db.String(200))
+    bucket_start = db.Column(db.DateTime, nullable=False)  # truncated to the hour
+    count = db.Column(db.Integer, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint('device_id', 'app_name', 'bucket_start', name='uq_baseline_bucket'),
+    )
+
+
+class BaselineWatermark(db.Model):
+    """Highest ActivityLog id already folded into a device's baseline buckets."""
+    __tablename__ = 'baseline_watermarks'
+    device_id = db.Column(db.Integer, db.ForeignKey('android_devices.id'), primary_key=True)
+    last_log_id = db.Column(db.Integer, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
 class ForegroundSnapshot(db.Model):
     """Point-in-time foreground app snapshots."""
     __tablename__ = 'foreground_snapshots'
@@ -76,3 +141,48 @@ class ForegroundSnapshot(db.Model):
     category = db.Column(db.String(50), default='normal')
 
     device = db.relationship('AndroidDevice', backref=db.backref('foreground_snapshots', lazy=True))
+
+
+class ForegroundSession(db.Model):
+    """One uninterrupted stretch of a package in the foreground (run-length encoded samples)."""
+    __tablename__ = 'foreground_sessions'
+    id = db.Column(db.Integer, primary_key=True)
+    device_id = db.Column(db.Integer, db.ForeignKey('android_devices.id'), nullable=False)
+    package_name = db.Column(db.String(200))
+    app_label = db.Column(db.String(200))
+    category = db.Column(db.String(50), default='normal')
+    started_at = db.Column(db.DateTime, nullable=False)
+    ended_at = db.Column(db.DateTime, nullable=False)  # last sample seen
+    sample_count = db.Column(db.Integer, default=1)
+
+    device = db.relationship('AndroidDevice', backref=db.backref('foreground_sessions', lazy=True))
+
+    __table_args__ = (
+        db.Index('ix_foreground_sessions_device_started', 'device_id', 'started_at'),
+    )
+
+
+def upgrade_schema():
+    """
+    Bring an existing database up to date with the models.
+    create_all() only creates missing tables, so nullable columns and
+    indexes added to existing tables later are created here.
+    """
+    inspector = db.inspect(db.engine)
+    preparer = db.engine.dialect.identifier_preparer
+    with db.engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            existing = {c['name'] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                if not column.nullable:
+                    print(f"[SCHEMA] Cannot add NOT NULL column {table.name}.{column.name}; migrate manually")
+                    continue
+                ddl = (f'ALTER TABLE {preparer.format_table(table)} ADD COLUMN '
+                       f'{preparer.format_column(column)} {column.type.compile(db.engine.dialect)}')
+                conn.execute(db.text(ddl))
+                print(f"[SCHEMA] Added column {table.name}.{column.name}")
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
@@ -0,0 +1,100 @@
+"""
+Differential installed-package inventory.
+Each device's package list is cached together with the APK paths. A
+rescan (`pm list packages -f`) only runs every PACKAGE_RESCAN_SECONDS or
+after logcat reported a package change. It is diffed against the cache,
+so only added and updated packages get classified and scanned.
+"""
+import os
+import threading
+import time
+
+
+# Full `pm list packages` rescan cadence without package-change events
+PACKAGE_RESCAN_SECONDS = float(os.environ.get('PACKAGE_RESCAN_SECONDS', '600'))
+
+
+class PackageInventory:
+    """Per-device package snapshots producing added/removed/updated diffs."""
+
+    def __init__(self, classify, rescan_every=PACKAGE_RESCAN_SECONDS):
+        self.classify = classify  # package name -> is_suspicious
+        self.rescan_every = rescan_every
+        self._snapshots = {}   # serial -> {package: {'package', 'path', 'is_suspicious'}}
+        self._scanned_at = {}  # serial -> monotonic time of the last rescan
+        self._dirty = {}       # serial -> monotonic time of its latest package-change event
+        self._lock = threading.Lock()
+        self.rescans = 0
+        self.classified = 0
+
+    def mark_dirty(self, serial):
+        """Force a rescan on the next cycle (a package was installed/removed/updated)."""
+        with self._lock:
+            self._dirty[serial] = time.monotonic()
+
+    def needs_rescan(self, serial):
+        with self._lock:
+            scanned = self._scanned_at.get(serial)
+            return (scanned is None or serial in self._dirty
+                    or time.monotonic() - scanned >= self.rescan_every)
+
+    def diff(self, serial, listing):
+        """
+        Compare a fresh listing of {'package', 'path'} dicts with the
+        device's snapshot without changing it:
+        {'added': [pkg], 'updated': [pkg], 'removed': [name]}.
+        A changed APK path means the package was reinstalled or updated.
+        """
+        return self._diff(serial, listing)[1]
+
+    def update(self, serial, listing, listed_at=None):
+        """
+        Replace a device's snapshot with a fresh listing and return the diff.
+        Call it once the diff has been acted on: until then the device stays
+        due for a rescan and the same changes show up again. listed_at is
+        the monotonic time the listing was taken; package changes reported
+        after it keep the device marked for another rescan.
+        """
+        listed_at = time.monotonic() if listed_at is None else listed_at
+        current, diff = self._diff(serial, listing)
+        with self._lock:
+            self._snapshots[serial] = current
+            self._scanned_at[serial] = listed_at
+            if self._dirty.get(serial, listed_at) <= listed_at:
+                self._dirty.pop(serial, None)
+            self.rescans += 1
+            self.classified += len(diff['added']) + len(diff['updated'])
+        return diff
+
+    def _diff(self, serial, listing):
+        with self._lock:
+            previous = self._snapshots.get(serial, {})
+        current, added, updated = {}, [], []
+        for entry in listing:
+            name = entry['package']
+            old = previous.get(name)
+            if old is not None and old['path'] == entry['path']:
+                current[name] = old
+                continue
+            pkg = {'package': name, 'path': entry['path'], 'is_suspicious': self.classify(name)}
+            current[name] = pkg
+            (updated if old is not None else added).append(pkg)
+        removed = [name for name in previous if name not in current]
+        return current, {'added': added, 'updated': updated, 'removed': removed}
+
+    def retain(self, serials):
+        """Drop the snapshots of devices not in serials (they went offline)."""
+        with self._lock:
+            for serial in [s for s in self._scanned_at if s not in serials]:
+                self._snapshots.pop(serial, None)
+                self._scanned_at.pop(serial, None)
+            for serial in [s for s in self._dirty if s not in serials]:
+                del self._dirty[serial]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'devices': {serial: len(pkgs) for serial, pkgs in self._snapshots.items()},
+                'pendingRescans': sorted(self._dirty),
+                'rescans': self.rescans, 'classified': self.classified,
+            }